@@ -0,0 +1,196 @@
+import glob
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Segment lifecycle (one writer per process, so several gunicorn workers can share a directory):
+#   activity-<pid>-<seq>.open     being appended to by process <pid>
+#   activity-<pid>-<seq>.ready    sealed, waiting for the loader
+#   activity-<pid>-<seq>.loading-<loader pid>  claimed by a loader (renamed atomically)
+#   activity-<pid>-<seq>.failed   quarantined after max_attempts failed loads; rename it
+#                                 back to .ready to retry once the cause is fixed
+# A segment is deleted only after its rows are committed, so delivery is at-least-once:
+# a crash between commit and delete replays that one segment.
+OPEN_SUFFIX = '.open'
+READY_SUFFIX = '.ready'
+LOADING_SUFFIX = '.loading'
+FAILED_SUFFIX = '.failed'
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except Exception:
+        # Exists but owned by someone else, or platform without signal 0 support
+        return True
+    return True
+
+
+def _segment_pid(path: str) -> Optional[int]:
+    try:
+        return int(os.path.basename(path).split('-')[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class ActivityLog:
+    """Append-only, segmented newline-delimited JSON log of raw activity events.
+
+    Request handlers call ``append()``, which only writes a line to the local segment file.
+    A background thread seals the segment every ``load_interval`` seconds (or when it
+    exceeds ``segment_max_bytes``) and passes all of its records to ``loader_fn``, which
+    is expected to bulk-insert them in a single transaction. A segment whose load fails
+    ``max_attempts`` times in a row is quarantined so it cannot wedge the loader.
+    """
+
+    def __init__(self, directory: str, loader_fn: Callable[[List[Dict[str, Any]]], None],
+                 segment_max_bytes: int = 4 * 1024 * 1024, load_interval: float = 2.0,
+                 max_attempts: int = 5):
+        self.directory = directory
+        self.loader_fn = loader_fn
+        self.segment_max_bytes = int(segment_max_bytes)
+        self.load_interval = float(load_interval)
+        self.max_attempts = max(1, int(max_attempts))
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._seq = 0
+        self._file = None
+        self._path: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        os.makedirs(self.directory, exist_ok=True)
+
+    # ------------------------------------------------------------------ writing
+    def append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=_json_default, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            self._file.write(line)
+            self._file.flush()
+            if self._file.tell() >= self.segment_max_bytes:
+                self._seal_current()
+
+    def _open_segment(self) -> None:
+        self._seq += 1
+        stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        self._path = os.path.join(self.directory, f'activity-{os.getpid()}-{stamp}{self._seq:06d}{OPEN_SUFFIX}')
+        self._file = open(self._path, 'a', encoding='utf-8')
+
+    def _seal_current(self) -> None:
+        """Close the active segment and hand it to the loader. Caller holds ``_lock``."""
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(self._path, self._path[:-len(OPEN_SUFFIX)] + READY_SUFFIX)
+        self._file = None
+        self._path = None
+
+    def seal(self) -> None:
+        with self._lock:
+            if self._file is not None and self._file.tell() > 0:
+                self._seal_current()
+
+    # ------------------------------------------------------------------ loading
+    def recover(self) -> None:
+        """Make segments left behind by dead processes loadable again."""
+        for path in glob.glob(os.path.join(self.directory, '*' + OPEN_SUFFIX)):
+            pid = _segment_pid(path)
+            if path != self._path and (pid is None or pid == os.getpid() or not _pid_alive(pid)):
+                os.replace(path, path[:-len(OPEN_SUFFIX)] + READY_SUFFIX)
+        for path in glob.glob(os.path.join(self.directory, '*' + LOADING_SUFFIX + '-*')):
+            claimer = path.rsplit('-', 1)[-1]
+            if not claimer.isdigit() or not _pid_alive(int(claimer)):
+                base = path[:path.rindex(LOADING_SUFFIX)]
+                os.replace(path, base + READY_SUFFIX)
+
+    def load_ready_segments(self) -> int:
+        """Load every sealed segment; returns the number of records handed to ``loader_fn``.
+
+        A failing segment does not stop the others from loading; the last error is
+        re-raised once every segment has been tried.
+        """
+        loaded = 0
+        error: Optional[Exception] = None
+        with self._load_lock:
+            for path in sorted(glob.glob(os.path.join(self.directory, '*' + READY_SUFFIX))):
+                claimed = path[:-len(READY_SUFFIX)] + f'{LOADING_SUFFIX}-{os.getpid()}'
+                try:
+                    os.replace(path, claimed)
+                except FileNotFoundError:
+                    continue  # another worker claimed it first
+                try:
+                    loaded += self._load_segment(claimed)
+                except Exception as e:
+                    error = e
+                    attempts = self._failures.pop(path, 0) + 1
+                    if attempts >= self.max_attempts:
+                        os.replace(claimed, path[:-len(READY_SUFFIX)] + FAILED_SUFFIX)
+                        print(f"Activity log segment {os.path.basename(path)} quarantined after {attempts} failed loads: {e}")
+                    else:
+                        # Leave it for the next pass
+                        self._failures[path] = attempts
+                        os.replace(claimed, path)
+                    continue
+                self._failures.pop(path, None)
+                os.remove(claimed)
+        if error is not None:
+            raise error
+        return loaded
+
+    def _load_segment(self, path: str) -> int:
+        records: List[Dict[str, Any]] = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Torn final line from a crash mid-write
+                    continue
+        if records:
+            self.loader_fn(records)
+        return len(records)
+
+    def start(self) -> None:
+        """Replay leftovers from earlier runs and start the background loader."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.recover()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='activity-log-loader', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.seal()
+                self.load_ready_segments()
+            except Exception as e:
+                print(f"Activity log loader error: {e}")
+            if self._stop.wait(self.load_interval):
+                break
+
+    def shutdown(self) -> None:
+        """Stop the loader and load whatever has been written so far."""
+        self._stop.set()
+        try:
+            self.seal()
+            self.load_ready_segments()
+        except Exception as e:
+            print(f"Activity log flush on shutdown failed: {e}")
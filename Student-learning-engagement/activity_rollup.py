@@ -0,0 +1,90 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+GRANULARITIES = ('hour', 'day')
+
+# (student_id, resource_id, period_start)
+RollupKey = Tuple[int, int, datetime]
+
+# Activity types whose data['duration'] (seconds) is summed into a rollup column
+DURATION_FIELDS = {'time_spent': 'time_spent', 'focus_time': 'focus_time', 'idle_time': 'idle_time'}
+
+# Parts of the day used to describe when a student is most active
+DAY_PARTS = ((5, 'Morning'), (12, 'Afternoon'), (17, 'Evening'), (21, 'Night'))
+
+
+def period_start(timestamp: datetime, granularity: str) -> datetime:
+    """Start of the hour or day containing ``timestamp``."""
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f'Unknown rollup granularity: {granularity}')
+
+
+def empty_bucket() -> Dict[str, Any]:
+    return {'event_count': 0, 'activity_counts': {}, 'time_spent': 0, 'focus_time': 0, 'idle_time': 0, 'max_scroll': 0.0}
+
+
+def fold_event(bucket: Dict[str, Any], activity_type: str, data: Optional[Mapping[str, Any]]) -> None:
+    """Add one raw activity event to ``bucket`` (in place).
+
+    Durations and scroll depth are read as the engagement rollup reads them; values a
+    client sent in the wrong shape still count the event but add nothing else.
+    """
+    bucket['event_count'] += 1
+    bucket['activity_counts'][activity_type] = bucket['activity_counts'].get(activity_type, 0) + 1
+    data = data if isinstance(data, Mapping) else {}
+    try:
+        if activity_type in DURATION_FIELDS:
+            bucket[DURATION_FIELDS[activity_type]] += int(data.get('duration', 0) or 0)
+        elif activity_type == 'scroll':
+            depth = float(data.get('max_scroll_depth') or data.get('scroll_percentage') or 0.0)
+            bucket['max_scroll'] = max(bucket['max_scroll'], depth)
+    except (TypeError, ValueError):
+        pass
+
+
+def merge_bucket(into: Dict[str, Any], other: Mapping[str, Any]) -> Dict[str, Any]:
+    """Add ``other`` into ``into`` (in place) and return it."""
+    into['event_count'] = (into.get('event_count') or 0) + (other.get('event_count') or 0)
+    counts = dict(into.get('activity_counts') or {})
+    for activity_type, count in (other.get('activity_counts') or {}).items():
+        counts[activity_type] = counts.get(activity_type, 0) + count
+    into['activity_counts'] = counts
+    for field in DURATION_FIELDS.values():
+        into[field] = (into.get(field) or 0) + (other.get(field) or 0)
+    into['max_scroll'] = max(into.get('max_scroll') or 0.0, other.get('max_scroll') or 0.0)
+    return into
+
+
+def rollup_events(rows: Iterable[Tuple[int, int, str, datetime, Any]], granularity: str) -> Dict[RollupKey, Dict[str, Any]]:
+    """Buckets for (student_id, resource_id, activity_type, timestamp, data) rows."""
+    buckets: Dict[RollupKey, Dict[str, Any]] = {}
+    for student_id, resource_id, activity_type, timestamp, data in rows:
+        key = (student_id, resource_id, period_start(timestamp, granularity))
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = empty_bucket()
+        fold_event(bucket, activity_type, data)
+    return buckets
+
+
+def most_active_time(events_by_hour: Mapping[int, int]) -> str:
+    """Describe the busiest hour of day, e.g. ``Afternoon (2-3 PM)``; ``N/A`` without events."""
+    hours = Counter({hour: count for hour, count in events_by_hour.items() if count})
+    if not hours:
+        return 'N/A'
+    hour = max(sorted(hours), key=lambda h: hours[h])
+    part = 'Night'
+    for start, name in DAY_PARTS:
+        if hour >= start:
+            part = name
+    start = datetime(2000, 1, 1, hour)
+    end = start + timedelta(hours=1)
+    start_label = start.strftime('%I').lstrip('0')
+    end_label = end.strftime('%I %p').lstrip('0')
+    if start.strftime('%p') != end.strftime('%p'):
+        start_label = start.strftime('%I %p').lstrip('0')
+    return f'{part} ({start_label}-{end_label})'
@@ -0,0 +1,217 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Sequence, Tuple
+
+_DATETIME_TAG = '__datetime__'
+
+
+def _encode(value: Any) -> str:
+    def default(obj):
+        if isinstance(obj, datetime):
+            return {_DATETIME_TAG: obj.isoformat()}
+        raise TypeError(f'{type(obj).__name__} is not JSON serializable')
+    return json.dumps(value, default=default, separators=(',', ':'))
+
+
+def _decode(text: str) -> Any:
+    def object_hook(obj):
+        if len(obj) == 1 and _DATETIME_TAG in obj:
+            return datetime.fromisoformat(obj[_DATETIME_TAG])
+        return obj
+    return json.loads(text, object_hook=object_hook)
+
+
+class AnalyticsCache:
+    """Short-lived cache of per-teacher analytics results.
+
+    Entries are keyed by (teacher, endpoint, params) and live ``ttl_seconds``. Each
+    teacher has a generation number; ``invalidate`` bumps it, so every entry computed
+    before the bump is a miss from then on, including results still being computed.
+
+    Values are held in an in-process LRU of ``max_entries``. With ``path`` set they are
+    also written (as JSON; datetimes survive the round trip) to a SQLite file shared by
+    all gunicorn workers, and generations live in that file, so an invalidation in one
+    worker is seen by the others on their next read.
+    """
+
+    def __init__(self, ttl_seconds: float = 30, max_entries: int = 1000, path: Optional[str] = None):
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = int(max_entries)
+        self.path = path or None
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple, Tuple[int, float, Any]]' = OrderedDict()
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self._initialize()
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _initialize(self) -> None:
+        # Deferred to first use so importing the app does not create the file
+        with self._init_lock:
+            if self._initialized:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with closing(sqlite3.connect(self.path, timeout=10)) as conn, conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS analytics_cache ('
+                    ' key TEXT PRIMARY KEY,'
+                    ' teacher_id INTEGER NOT NULL,'
+                    ' generation INTEGER NOT NULL,'
+                    ' value TEXT NOT NULL,'
+                    ' expires_at REAL NOT NULL,'
+                    ' last_used REAL NOT NULL)'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS ix_analytics_cache_teacher ON analytics_cache (teacher_id)')
+                conn.execute('CREATE INDEX IF NOT EXISTS ix_analytics_cache_last_used ON analytics_cache (last_used)')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS analytics_generation ('
+                    ' teacher_id INTEGER PRIMARY KEY,'
+                    ' generation INTEGER NOT NULL)'
+                )
+            self._initialized = True
+
+    @staticmethod
+    def _key(teacher_id: int, endpoint: str, params: Sequence[Hashable]) -> Tuple:
+        return (teacher_id, endpoint) + tuple(params)
+
+    @staticmethod
+    def _disk_key(key: Tuple) -> str:
+        return ':'.join('-' if part is None else str(part) for part in key)
+
+    def generation(self, teacher_id: int) -> int:
+        if self.path is None:
+            with self._lock:
+                return self._generations.get(teacher_id, 0)
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT generation FROM analytics_generation WHERE teacher_id = ?', (teacher_id,)).fetchone()
+        return row[0] if row else 0
+
+    def _lookup(self, key: Tuple, generation: int) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == generation and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    return entry[2]
+                del self._entries[key]
+        if self.path is None:
+            return None
+        disk_key = self._disk_key(key)
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                'SELECT value, expires_at FROM analytics_cache WHERE key = ? AND generation = ?', (disk_key, generation)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                return None
+            conn.execute('UPDATE analytics_cache SET last_used = ? WHERE key = ?', (now, disk_key))
+        value = _decode(row[0])
+        self._remember(key, generation, row[1], value)
+        return value
+
+    def _remember(self, key: Tuple, generation: int, expires_at: float, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (generation, expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, teacher_id: int, endpoint: str, params: Sequence[Hashable] = (),
+            generation: Optional[int] = None) -> Optional[Any]:
+        if generation is None:
+            generation = self.generation(teacher_id)
+        value = self._lookup(self._key(teacher_id, endpoint, params), generation)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, teacher_id: int, endpoint: str, value: Any, params: Sequence[Hashable] = (),
+            generation: Optional[int] = None) -> None:
+        """Store ``value``; pass the ``generation`` read before computing it so a result
+        computed across an invalidation is never served."""
+        if generation is None:
+            generation = self.generation(teacher_id)
+        key = self._key(teacher_id, endpoint, params)
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        if self.path is not None:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO analytics_cache (key, teacher_id, generation, value, expires_at, last_used)'
+                    ' VALUES (?, ?, ?, ?, ?, ?)',
+                    (self._disk_key(key), teacher_id, generation, _encode(value), expires_at, now),
+                )
+                (count,) = conn.execute('SELECT COUNT(*) FROM analytics_cache').fetchone()
+                if count > self.max_entries:
+                    conn.execute(
+                        'DELETE FROM analytics_cache WHERE key IN '
+                        '(SELECT key FROM analytics_cache ORDER BY last_used ASC LIMIT ?)',
+                        (count - self.max_entries,),
+                    )
+        self._remember(key, generation, expires_at, value)
+
+    def get_or_compute(self, teacher_id: int, endpoint: str, compute_fn: Callable[[], Any],
+                       params: Sequence[Hashable] = (), store_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Return the cached value or compute and return it.
+
+        ``None`` results, and results ``store_if`` rejects, are returned but not cached.
+        """
+        generation = self.generation(teacher_id)
+        value = self.get(teacher_id, endpoint, params, generation=generation)
+        if value is not None:
+            return value
+        value = compute_fn()
+        if value is not None and (store_if is None or store_if(value)):
+            self.set(teacher_id, endpoint, value, params, generation=generation)
+        return value
+
+    def invalidate(self, teacher_ids: Iterable[int]) -> None:
+        """Make every cached result of these teachers stale."""
+        teacher_ids = sorted({teacher_id for teacher_id in teacher_ids if teacher_id is not None})
+        if not teacher_ids:
+            return
+        with self._lock:
+            for teacher_id in teacher_ids:
+                self._generations[teacher_id] = self._generations.get(teacher_id, 0) + 1
+            for key in [key for key in self._entries if key[0] in teacher_ids]:
+                del self._entries[key]
+        if self.path is None:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                'INSERT INTO analytics_generation (teacher_id, generation) VALUES (?, 1)'
+                ' ON CONFLICT(teacher_id) DO UPDATE SET generation = generation + 1',
+                [(teacher_id,) for teacher_id in teacher_ids],
+            )
+            conn.execute(
+                f"DELETE FROM analytics_cache WHERE teacher_id IN ({', '.join('?' * len(teacher_ids))})", teacher_ids
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.path is not None:
+            with closing(self._connect()) as conn, conn:
+                conn.execute('DELETE FROM analytics_cache')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        return {'hits': self.hits, 'misses': self.misses, 'local_entries': entries, 'shared': self.path is not None}
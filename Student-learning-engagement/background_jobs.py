@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class CoalescingWorker:
+    """Background worker that runs ``handler(key, *args)`` at most once per ``interval`` per key.
+
+    Submitting a key that is already queued only replaces its arguments, so a burst of
+    events for the same session collapses into a single run. Keys that ran less than
+    ``interval`` seconds ago wait until they are due. When ``max_queue`` distinct keys are
+    waiting, new keys are rejected rather than growing the queue without bound.
+    """
+
+    def __init__(self, handler: Callable[..., Any], interval: float = 60.0, max_queue: int = 1000,
+                 name: str = 'coalescing-worker'):
+        self.handler = handler
+        self.interval = float(interval)
+        self.max_queue = int(max_queue)
+        self.name = name
+        self._pending: 'OrderedDict[Hashable, Tuple[Any, ...]]' = OrderedDict()
+        self._last_run: Dict[Hashable, float] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = False
+        self.dropped = 0
+
+    def submit(self, key: Hashable, *args: Any) -> bool:
+        with self._cond:
+            if key in self._pending:
+                self._pending[key] = args
+                return True
+            if len(self._pending) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._pending[key] = args
+            self._cond.notify()
+        self._ensure_thread()
+        return True
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def _ensure_thread(self) -> None:
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _next_due(self) -> Tuple[Optional[Hashable], float]:
+        """Return (due key, 0) or (None, seconds until the earliest key is due). Caller holds the lock."""
+        now = time.monotonic()
+        wait = self.interval
+        for key in self._pending:
+            due_at = self._last_run.get(key, 0.0) + self.interval
+            if due_at <= now:
+                return key, 0.0
+            wait = min(wait, due_at - now)
+        return None, wait
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                key, wait = self._next_due()
+                while key is None and not self._stop:
+                    self._cond.wait(timeout=wait if self._pending else None)
+                    key, wait = self._next_due()
+                if key is None:
+                    return
+                args = self._pending.pop(key)
+                now = time.monotonic()
+                self._last_run[key] = now
+                # Forget keys that can no longer throttle anything
+                stale = [k for k, t in self._last_run.items() if now - t > self.interval and k not in self._pending]
+                for k in stale:
+                    del self._last_run[k]
+            try:
+                self.handler(key, *args)
+            except Exception as e:
+                print(f"{self.name} job for {key} failed: {e}")
+
+    def run_pending(self) -> int:
+        """Run every queued key now, ignoring the interval (used on shutdown and in tests)."""
+        ran = 0
+        while True:
+            with self._cond:
+                if not self._pending:
+                    return ran
+                key, args = self._pending.popitem(last=False)
+                self._last_run[key] = time.monotonic()
+            try:
+                self.handler(key, *args)
+            except Exception as e:
+                print(f"{self.name} job for {key} failed: {e}")
+            ran += 1
+
+    def shutdown(self, drain: bool = False) -> None:
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if drain:
+            self.run_pending()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the /api/teacher/ml_analytics aggregation paths in engagement_analytics.
+
+Each size gets a fresh SQLite file with a resource_engagement-shaped table; a third of
+the students belong to the teacher and a quarter of the rows are older than the 7-day
+window. Reported per path (median of --repeat runs):
+
+    sql    one CASE-bucketed aggregate query (the default engine)
+    numpy  fetch the ten metric columns, aggregate in NumPy (the fallback engine)
+    rows   fetch every matching row as a Python object: what the old per-row
+           implementation paid before its ~15 passes over the list
+
+    python bench_ml_analytics.py --sizes 10000,100000,1000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, Table, create_engine, select
+
+import engagement_analytics as ea
+
+metadata = MetaData()
+engagement = Table(
+    'resource_engagement', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('student_id', Integer, index=True),
+    Column('last_updated', DateTime),
+    *[Column(name, Float if name in ('scroll_depth', 'reading_speed', 'engagement_score') else Integer)
+      for name in ea.COLUMNS]
+)
+
+STUDENTS = 300
+TEACHER_STUDENTS = list(range(0, STUDENTS, 3))
+
+
+def _seed(path, rows):
+    engine = create_engine(f'sqlite:///{path}')
+    metadata.create_all(engine)
+    engine.dispose()
+    rng = random.Random(rows)
+    now = datetime.now()
+    connection = sqlite3.connect(path)
+    columns = ', '.join(('student_id', 'last_updated') + ea.COLUMNS)
+    connection.executemany(
+        f"INSERT INTO resource_engagement ({columns}) VALUES ({', '.join('?' * (len(ea.COLUMNS) + 2))})",
+        ((rng.randrange(STUDENTS), (now - timedelta(days=rng.uniform(0, 9.3))).isoformat(sep=' '),
+          (spent := rng.randint(0, 2400)), rng.randint(0, spent), rng.uniform(0, 100), rng.randint(0, 40),
+          rng.randint(0, 120), rng.randint(0, 5), rng.randint(0, 6), rng.choice([0.0, rng.uniform(50, 300)]),
+          rng.randint(0, spent + 1), rng.uniform(0, 100)) for _ in range(rows))
+    )
+    connection.commit()
+    connection.execute('ANALYZE')
+    connection.close()
+
+
+def _timed(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def run(rows, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        started = time.perf_counter()
+        _seed(path, rows)
+        seeded = time.perf_counter() - started
+        engine = create_engine(f'sqlite:///{path}')
+        criteria = (engagement.c.student_id.in_(TEACHER_STUDENTS),
+                    engagement.c.last_updated >= datetime.now() - timedelta(days=7))
+        with engine.connect() as conn:
+            def sql_path():
+                return ea.metrics_from_totals(ea.totals_from_row(conn.execute(ea.totals_query(engagement, *criteria)).mappings().one()))
+
+            def numpy_path():
+                fetched = conn.execute(select(*[engagement.c[name] for name in ea.COLUMNS]).where(*criteria)).all()
+                return ea.metrics_from_totals(ea.totals_from_rows(fetched))
+
+            def rows_path():
+                return [SimpleNamespace(**row) for row in conn.execute(select(engagement).where(*criteria)).mappings()]
+
+            sql_ms, sql_metrics = _timed(sql_path, repeat)
+            numpy_ms, numpy_metrics = _timed(numpy_path, repeat)
+            rows_ms, matched = _timed(rows_path, repeat)
+        engine.dispose()
+    assert abs(sql_metrics['focus_percentage'] - numpy_metrics['focus_percentage']) < 1e-6
+    print(f"{rows:>9,} rows ({len(matched):,} in window, seeded in {seeded:.1f}s): "
+          f"sql {sql_ms:8.1f} ms | numpy {numpy_ms:8.1f} ms | rows {rows_ms:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='comma-separated engagement row counts')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    for size in args.sizes.split(','):
+        run(int(size), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the SQLite connection profiles in db_tuning.
+
+Writer threads commit small activity rows one at a time (like /api/track_activity)
+while reader threads run a dashboard-style aggregate. Each profile runs on a fresh
+database file; compare read latency and lock errors between 'legacy' and 'wal'.
+
+    python bench_sqlite_concurrency.py --seconds 5 --writers 2 --readers 4
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import db_tuning
+
+
+def _connect(path, pragmas):
+    connection = sqlite3.connect(path, timeout=0, check_same_thread=False)
+    db_tuning.apply_pragmas(connection, pragmas)
+    return connection
+
+
+def _seed(path, pragmas, rows):
+    connection = _connect(path, pragmas)
+    connection.execute("""CREATE TABLE student_activity (
+        id INTEGER PRIMARY KEY, student_id INTEGER, resource_id INTEGER,
+        activity_type TEXT, timestamp REAL, data TEXT)""")
+    connection.executemany(
+        "INSERT INTO student_activity (student_id, resource_id, activity_type, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+        [(i % 200, i % 40, 'scroll', time.time(), '{}') for i in range(rows)]
+    )
+    connection.commit()
+    connection.close()
+
+
+def run_profile(profile, seconds, writers, readers, seed_rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        pragmas = db_tuning.sqlite_pragmas(profile)
+        _seed(path, pragmas, seed_rows)
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats = {'writes': 0, 'reads': 0, 'write_errors': 0, 'read_errors': 0, 'read_latency': []}
+
+        def writer(n):
+            connection = _connect(path, pragmas)
+            while not stop.is_set():
+                try:
+                    connection.execute(
+                        "INSERT INTO student_activity (student_id, resource_id, activity_type, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                        (n, n % 40, 'heartbeat', time.time(), '{"focus": true}')
+                    )
+                    connection.commit()
+                    with lock:
+                        stats['writes'] += 1
+                except sqlite3.OperationalError:
+                    connection.rollback()
+                    with lock:
+                        stats['write_errors'] += 1
+            connection.close()
+
+        def reader():
+            connection = _connect(path, pragmas)
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    connection.execute(
+                        "SELECT resource_id, COUNT(*), COUNT(DISTINCT student_id) FROM student_activity GROUP BY resource_id"
+                    ).fetchall()
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        stats['reads'] += 1
+                        stats['read_latency'].append(elapsed)
+                except sqlite3.OperationalError:
+                    with lock:
+                        stats['read_errors'] += 1
+            connection.close()
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+
+    latency = sorted(stats['read_latency']) or [0.0]
+    return {
+        'profile': profile,
+        'writes_per_s': stats['writes'] / seconds,
+        'reads_per_s': stats['reads'] / seconds,
+        'read_p50_ms': latency[len(latency) // 2] * 1000,
+        'read_p95_ms': latency[int(len(latency) * 0.95) - 1 if len(latency) > 1 else 0] * 1000,
+        'write_errors': stats['write_errors'],
+        'read_errors': stats['read_errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seed-rows', type=int, default=50000)
+    parser.add_argument('--profiles', default='legacy,wal')
+    args = parser.parse_args()
+
+    print(f"{'profile':<8} {'writes/s':>9} {'reads/s':>8} {'read p50':>9} {'read p95':>9} {'lock errors (w/r)':>18}")
+    for profile in args.profiles.split(','):
+        r = run_profile(profile.strip(), args.seconds, args.writers, args.readers, args.seed_rows)
+        print(f"{r['profile']:<8} {r['writes_per_s']:>9.0f} {r['reads_per_s']:>8.0f} "
+              f"{r['read_p50_ms']:>7.1f}ms {r['read_p95_ms']:>7.1f}ms "
+              f"{r['write_errors']:>9}/{r['read_errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+pytest configuration: point the app at a throwaway database before any test imports it.
+
+Set TEST_DATABASE_URL (e.g. postgresql://localhost/learning_test) to run the suite
+against that database; otherwise a temporary SQLite file is used, so the bundled
+instance/students.db is never modified. LLM calls use the offline stub client, and the
+LLM cache and model files live in the same temporary directory.
+"""
+
+import os
+import secrets
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ml_service
+
+_tmp = tempfile.mkdtemp(prefix='learning-tests-')
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///' + os.path.join(_tmp, 'students.db')
+os.environ.setdefault('LLM_CLIENT', 'stub')
+os.environ['LLM_CACHE_PATH'] = os.path.join(_tmp, 'llm_cache.db')
+# Finalized quizzes checkpoint the online model; start from a copy of the bundled model
+# so models/ is left alone too
+_bundled_model = ml_service.MODEL_PATH
+ml_service.MODEL_PATH = os.path.join(_tmp, 'models', 'model.json')
+os.makedirs(os.path.dirname(ml_service.MODEL_PATH))
+if os.path.exists(_bundled_model):
+    shutil.copy(_bundled_model, ml_service.MODEL_PATH)
+# Tests compact activity rollups explicitly; a background run started by whichever test
+# happens to record activity first would race them
+os.environ.setdefault('ACTIVITY_ROLLUP_ENABLED', 'false')
+
+
+# Shared test data helpers. They import the app lazily so the settings above are in
+# place first; call them inside an app context and commit when the setup is complete.
+
+def new_tag():
+    """Random suffix that keeps usernames, emails and student ids unique across tests."""
+    return secrets.token_hex(4)
+
+
+def make_user(role='teacher', tag=None):
+    """Add a user with password ``pw`` and flush it so it has an id."""
+    from app import db, User
+    tag = tag or new_tag()
+    user = User(username=f'{role}-{tag}', email=f'{role}-{tag}@example.com', role=role)
+    user.set_password('pw')
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def make_resource(teacher, resource_type='note', grade='7', title=None, **fields):
+    """Add a resource created by ``teacher`` and flush it (pages render its description)."""
+    from app import db, Resource
+    title = title or resource_type.title()
+    fields.setdefault('description', f'{title} for grade {grade}')
+    resource = Resource(title=title, resource_type=resource_type, created_by=teacher.id, grade=grade, **fields)
+    db.session.add(resource)
+    db.session.flush()
+    return resource
+
+
+def make_students(teacher, count=1, grade='7', tag=None, with_login=False):
+    """Add ``count`` students of ``teacher`` (each with a student account when ``with_login``) and flush them."""
+    from app import db, Student
+    tag = tag or new_tag()
+    students = []
+    for i in range(count):
+        user = make_user('student', f'{tag}-{i}') if with_login else None
+        students.append(Student(name=f'Pupil {i}', student_id=f'S-{tag}-{i}', grade=grade,
+                                teacher_id=teacher.id, user_id=user.id if user else None))
+    db.session.add_all(students)
+    db.session.flush()
+    return students
+
+
+def logged_in_client(user_id):
+    """A test client whose session is logged in as ``user_id``."""
+    from app import app
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+    return client
+
+
+def csrf_token(client):
+    """A CSRF token valid for ``client``'s session, for form fields or the X-CSRFToken header."""
+    from flask import session
+    from flask_wtf.csrf import generate_csrf
+    from app import app
+    with app.test_request_context():
+        token = generate_csrf()
+        raw = session['csrf_token']
+    with client.session_transaction() as sess:
+        sess['csrf_token'] = raw
+    return token
@@ -0,0 +1,145 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+# Connection profiles for the SQLite database. 'wal' lets readers (teacher dashboards)
+# keep working while activity tracking commits; 'legacy' is SQLite's stock rollback
+# journal, where every commit briefly locks out readers.
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',  # durable across app crashes; an OS crash may lose the last commits
+        'busy_timeout': 5000,  # ms
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # negative = KiB, i.e. 64 MiB per connection
+        'temp_store': 'MEMORY',
+        'journal_size_limit': 64 * 1024 * 1024,  # WAL is truncated back to this after checkpoints
+    },
+    'legacy': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+    },
+}
+
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+
+def sqlite_pragmas(profile: str = 'wal', overrides: Optional[Mapping[str, Any]] = None) -> List[str]:
+    """PRAGMA statements for ``profile``; ``overrides`` values that are None are ignored."""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile {profile!r}; expected one of {sorted(SQLITE_PROFILES)}")
+    settings = dict(SQLITE_PROFILES[profile])
+    for name, value in (overrides or {}).items():
+        if value is not None:
+            settings[name] = value
+    # busy_timeout first so that switching journal_mode waits out other connections'
+    # locks instead of failing with "database is locked"
+    statements = []
+    for name in ('busy_timeout', 'journal_mode'):
+        if name in settings:
+            statements.append(f'PRAGMA {name}={settings.pop(name)}')
+    statements.append('PRAGMA foreign_keys=ON')
+    statements.extend(f'PRAGMA {name}={value}' for name, value in settings.items())
+    return statements
+
+
+def apply_pragmas(dbapi_connection: Any, statements: List[str]) -> None:
+    """Run PRAGMA statements on a new connection (a no-op for non-SQLite drivers)."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for statement in statements:
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+
+
+def current_pragmas(dbapi_connection: Any, names: List[str]) -> Dict[str, Any]:
+    cursor = dbapi_connection.cursor()
+    try:
+        return {name: cursor.execute(f'PRAGMA {name}').fetchone()[0] for name in names}
+    finally:
+        cursor.close()
+
+
+class SQLiteMaintenance:
+    """Periodic WAL checkpoints and ANALYZE runs on a background thread.
+
+    ``execute(statements)`` runs PRAGMA/ANALYZE statements on a fresh connection and
+    returns the rows of the last one. SQLite already checkpoints every 1000 pages, but
+    busy readers can keep it from finishing; the periodic checkpoint (plus
+    journal_size_limit) keeps the WAL from growing without bound. ANALYZE refreshes the
+    statistics the query planner uses to pick indexes; ``analysis_limit`` bounds its cost.
+    An interval of 0 disables that task.
+    """
+
+    def __init__(self, execute: Callable[[List[str]], Any], checkpoint_interval: float = 300.0,
+                 analyze_interval: float = 6 * 3600.0, checkpoint_mode: str = 'PASSIVE',
+                 analysis_limit: int = 1000, clock: Callable[[], float] = time.monotonic):
+        checkpoint_mode = checkpoint_mode.upper()
+        if checkpoint_mode not in CHECKPOINT_MODES:
+            raise ValueError(f"Unknown checkpoint mode {checkpoint_mode!r}; expected one of {CHECKPOINT_MODES}")
+        self.execute = execute
+        self.checkpoint_interval = float(checkpoint_interval)
+        self.analyze_interval = float(analyze_interval)
+        self.checkpoint_mode = checkpoint_mode
+        self.analysis_limit = int(analysis_limit)
+        self._clock = clock
+        started = clock()
+        self._last_checkpoint = started
+        self._last_analyze = started
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_checkpoint_result: Optional[Any] = None
+
+    def checkpoint(self) -> Any:
+        """Returns SQLite's (busy, wal frames, frames checkpointed) row."""
+        self.last_checkpoint_result = self.execute([f'PRAGMA wal_checkpoint({self.checkpoint_mode})'])
+        self._last_checkpoint = self._clock()
+        return self.last_checkpoint_result
+
+    def analyze(self) -> None:
+        self.execute([f'PRAGMA analysis_limit={self.analysis_limit}', 'ANALYZE'])
+        self._last_analyze = self._clock()
+
+    def run_due(self) -> List[str]:
+        """Run whichever tasks are due; returns their names."""
+        ran = []
+        now = self._clock()
+        if self.checkpoint_interval > 0 and now - self._last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+            ran.append('checkpoint')
+        if self.analyze_interval > 0 and now - self._last_analyze >= self.analyze_interval:
+            self.analyze()
+            ran.append('analyze')
+        return ran
+
+    def _tick(self) -> float:
+        intervals = [i for i in (self.checkpoint_interval, self.analyze_interval) if i > 0]
+        return max(1.0, min(intervals) / 4) if intervals else 0.0
+
+    def start(self) -> None:
+        if not self._tick() or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sqlite-maintenance', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._tick()):
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"SQLite maintenance error: {e}")
+
+    def shutdown(self) -> None:
+        """Stop the thread and fold the WAL back into the database file."""
+        self._stop.set()
+        if self.checkpoint_interval > 0:
+            try:
+                self.execute(['PRAGMA wal_checkpoint(TRUNCATE)'])
+            except Exception as e:
+                print(f"SQLite checkpoint on shutdown failed: {e}")
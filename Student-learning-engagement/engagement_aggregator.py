@@ -0,0 +1,189 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# (student_id, resource_id, session_id)
+EngagementKey = Tuple[int, int, Optional[int]]
+
+# Counters that are summed between flushes; scroll_depth is kept as a running max
+COUNTER_FIELDS = ('total_time_spent', 'cursor_movements', 'clicks', 'focus_time', 'idle_time')
+
+
+def _empty_delta() -> Dict[str, float]:
+    delta: Dict[str, float] = {name: 0 for name in COUNTER_FIELDS}
+    delta['scroll_depth'] = 0.0
+    delta['events'] = 0
+    return delta
+
+
+class EngagementAggregator:
+    """Write-behind buffer for ResourceEngagement rollups.
+
+    Activity events are folded into per-(student, resource, session) deltas in memory
+    and handed to ``flush_fn`` in one go when the durability window elapses, when the
+    number of buffered events reaches ``dirty_threshold`` or when ``flush()`` is called
+    explicitly (session end, shutdown).
+
+    Other processes may still hold deltas for a rollup when its session ends here, and
+    those land on top of the final totals. ``settle()`` hands the totals to ``settle_fn``
+    again once ``settle_delay`` (two durability windows by default) has passed, by which
+    time every process's timer has flushed what it buffered before the session ended.
+    """
+
+    def __init__(self, flush_fn: Callable[[Dict[EngagementKey, Dict[str, float]]], None],
+                 flush_interval: float = 5.0, dirty_threshold: int = 500,
+                 settle_fn: Optional[Callable[[Dict[EngagementKey, Dict[str, Any]]], None]] = None,
+                 settle_delay: Optional[float] = None):
+        self.flush_fn = flush_fn
+        self.flush_interval = float(flush_interval)
+        self.dirty_threshold = int(dirty_threshold)
+        self.settle_fn = settle_fn
+        self.settle_delay = 2 * self.flush_interval if settle_delay is None else float(settle_delay)
+        self._pending: Dict[EngagementKey, Dict[str, float]] = {}
+        # key -> (monotonic due time, final totals) waiting for settle_fn
+        self._finals: Dict[EngagementKey, Tuple[float, Dict[str, Any]]] = {}
+        self._dirty = 0
+        self._lock = threading.Lock()
+        # Serialises flushes so deltas are applied in the order they were drained
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def record(self, key: EngagementKey, activity_type: str, data: Dict[str, Any]) -> bool:
+        """Fold one event into the buffer. Returns False for event types it does not aggregate."""
+        data = data or {}
+        try:
+            if activity_type == 'time_spent':
+                field, amount = 'total_time_spent', int(data.get('duration', 0) or 0)
+            elif activity_type == 'focus_time':
+                field, amount = 'focus_time', int(data.get('duration', 0) or 0)
+            elif activity_type == 'idle_time':
+                field, amount = 'idle_time', int(data.get('duration', 0) or 0)
+            elif activity_type == 'cursor_move':
+                field, amount = 'cursor_movements', 1
+            elif activity_type == 'click':
+                field, amount = 'clicks', 1
+            elif activity_type == 'scroll':
+                field, amount = 'scroll_depth', float(data.get('max_scroll_depth') or data.get('scroll_percentage') or 0.0)
+            else:
+                return False
+        except (TypeError, ValueError):
+            # Bad client payloads are ignored rather than failing the request
+            return True
+
+        with self._lock:
+            delta = self._pending.get(key)
+            if delta is None:
+                delta = self._pending[key] = _empty_delta()
+            if field == 'scroll_depth':
+                delta['scroll_depth'] = max(delta['scroll_depth'], amount)
+            else:
+                delta[field] += amount
+            delta['events'] += 1
+            self._dirty += 1
+            over_threshold = self._dirty >= self.dirty_threshold
+        self._ensure_timer()
+        if over_threshold:
+            self.flush()
+        return True
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._dirty
+
+    def flush(self, key: Optional[EngagementKey] = None) -> int:
+        """Write buffered deltas through ``flush_fn``; only ``key`` when given.
+
+        Returns the number of rollups flushed. Deltas are put back if ``flush_fn`` raises.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if key is not None:
+                    batch = {key: self._pending.pop(key)} if key in self._pending else {}
+                    self._dirty -= sum(int(d['events']) for d in batch.values())
+                else:
+                    batch, self._pending = self._pending, {}
+                    self._dirty = 0
+            if not batch:
+                return 0
+            try:
+                self.flush_fn(batch)
+            except Exception:
+                self._restore(batch)
+                raise
+            return len(batch)
+
+    def settle(self, key: EngagementKey, totals: Dict[str, Any]) -> None:
+        """Re-apply a session's final ``totals`` through ``settle_fn`` after ``settle_delay``."""
+        if self.settle_fn is None:
+            return
+        with self._lock:
+            self._finals[key] = (time.monotonic() + self.settle_delay, dict(totals))
+        self._ensure_timer()
+
+    def settle_due(self, force: bool = False) -> int:
+        """Hand due final totals (all of them when ``force``) to ``settle_fn``; returns how many.
+
+        Totals are put back if ``settle_fn`` raises, unless a newer session end replaced them.
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = {key: final for key, final in self._finals.items() if force or final[0] <= now}
+            for key in due:
+                del self._finals[key]
+        if not due:
+            return 0
+        try:
+            self.settle_fn({key: totals for key, (_, totals) in due.items()})
+        except Exception:
+            with self._lock:
+                for key, final in due.items():
+                    self._finals.setdefault(key, final)
+            raise
+        return len(due)
+
+    def _restore(self, batch: Dict[EngagementKey, Dict[str, float]]) -> None:
+        with self._lock:
+            for key, delta in batch.items():
+                current = self._pending.get(key)
+                if current is None:
+                    self._pending[key] = delta
+                else:
+                    for name in COUNTER_FIELDS:
+                        current[name] += delta[name]
+                    current['scroll_depth'] = max(current['scroll_depth'], delta['scroll_depth'])
+                    current['events'] += delta['events']
+                self._dirty += int(delta['events'])
+
+    def _ensure_timer(self) -> None:
+        if self._timer is not None and self._timer.is_alive():
+            return
+        with self._lock:
+            if self._timer is not None and self._timer.is_alive():
+                return
+            self._stop.clear()
+            self._timer = threading.Thread(target=self._run, name='engagement-flush', daemon=True)
+            self._timer.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Engagement flush error: {e}")
+            try:
+                self.settle_due()
+            except Exception as e:
+                print(f"Engagement settle error: {e}")
+
+    def shutdown(self) -> None:
+        """Stop the background timer, flush whatever is still buffered and settle ended sessions now."""
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Engagement flush on shutdown failed: {e}")
+        try:
+            self.settle_due(force=True)
+        except Exception as e:
+            print(f"Engagement settle on shutdown failed: {e}")
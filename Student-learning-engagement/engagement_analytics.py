@@ -0,0 +1,152 @@
+from typing import Any, Dict, Mapping, Sequence
+
+import numpy as np
+from sqlalchemy import and_, case, func, select
+
+# resource_engagement columns the ML analytics read, in the order fetched by the NumPy path
+COLUMNS = ('total_time_spent', 'focus_time', 'scroll_depth', 'clicks', 'cursor_movements', 'return_count',
+           'distraction_count', 'reading_speed', 'idle_time', 'engagement_score')
+
+# Engagement-over-time bins by time spent on the resource: 0-5m, 5-10m, ..., 25-30m
+TIME_BIN_SECONDS = 300
+TIME_LABELS = ['0-5m', '5-10m', '10-15m', '15-20m', '20-25m', '25-30m']
+
+# Behaviour thresholds (per engagement row)
+FOCUSED_SHARE = 0.7  # focus_time above this share of time spent
+IDLE_SHARE = 0.5  # idle_time above this share of time spent
+DISTRACTED_COUNT = 3  # more than this many distractions
+ACTIVE_CURSOR = 50  # more than this many cursor movements
+LOW_RISK_SCORE = 80  # engagement_score >= 80: low risk; 60-80: medium; < 60: high
+MEDIUM_RISK_SCORE = 60
+
+READING_SPEED_MAX_WPM = 200
+
+TOTAL_KEYS = (
+    ['count', 'total_time', 'focus_time', 'scroll_depth', 'clicks', 'max_clicks', 'cursor', 'max_cursor',
+     'returns', 'distractions', 'reading_sum', 'reading_count', 'focused', 'distracted', 'active', 'idle',
+     'low_risk', 'medium_risk', 'high_risk']
+    + [f'bin{i}_count' for i in range(len(TIME_LABELS))]
+    + [f'bin{i}_score' for i in range(len(TIME_LABELS))]
+)
+
+
+def totals_query(table: Any, *criteria: Any) -> Any:
+    """One aggregate SELECT over ``table`` (resource_engagement or a table with the same columns).
+
+    Every total the metrics need is a SUM/COUNT/MAX, with CASE buckets for the behaviour
+    flags, time bins and risk bands, so the rows never leave the database. NULL columns
+    count as 0, as in the row-by-row calculation.
+    """
+    c = table.c
+
+    def z(column):
+        return func.coalesce(column, 0)
+
+    def count_if(condition):
+        return func.sum(case((condition, 1), else_=0))
+
+    time_spent = z(c.total_time_spent)
+    time_or_one = func.coalesce(func.nullif(c.total_time_spent, 0), 1)
+    score = z(c.engagement_score)
+    reading = and_(c.reading_speed.isnot(None), c.reading_speed != 0)
+    columns = [
+        func.count().label('count'),
+        func.sum(time_spent).label('total_time'),
+        func.sum(z(c.focus_time)).label('focus_time'),
+        func.sum(z(c.scroll_depth)).label('scroll_depth'),
+        func.sum(z(c.clicks)).label('clicks'),
+        func.max(z(c.clicks)).label('max_clicks'),
+        func.sum(z(c.cursor_movements)).label('cursor'),
+        func.max(z(c.cursor_movements)).label('max_cursor'),
+        func.sum(z(c.return_count)).label('returns'),
+        func.sum(z(c.distraction_count)).label('distractions'),
+        func.sum(case((reading, c.reading_speed), else_=0)).label('reading_sum'),
+        count_if(reading).label('reading_count'),
+        count_if(z(c.focus_time) > time_or_one * FOCUSED_SHARE).label('focused'),
+        count_if(z(c.distraction_count) > DISTRACTED_COUNT).label('distracted'),
+        count_if(z(c.cursor_movements) > ACTIVE_CURSOR).label('active'),
+        count_if(z(c.idle_time) > time_or_one * IDLE_SHARE).label('idle'),
+        count_if(score >= LOW_RISK_SCORE).label('low_risk'),
+        count_if(and_(score >= MEDIUM_RISK_SCORE, score < LOW_RISK_SCORE)).label('medium_risk'),
+        count_if(score < MEDIUM_RISK_SCORE).label('high_risk'),
+    ]
+    in_bins = [and_(time_spent >= i * TIME_BIN_SECONDS, time_spent < (i + 1) * TIME_BIN_SECONDS)
+               for i in range(len(TIME_LABELS))]
+    columns += [count_if(condition).label(f'bin{i}_count') for i, condition in enumerate(in_bins)]
+    columns += [func.sum(case((condition, score), else_=0)).label(f'bin{i}_score') for i, condition in enumerate(in_bins)]
+    return select(*columns).select_from(table).where(*criteria)
+
+
+def totals_from_row(row: Mapping[str, Any]) -> Dict[str, float]:
+    """Totals from the row returned by ``totals_query`` (SUMs over no rows are NULL)."""
+    return {key: row[key] or 0 for key in TOTAL_KEYS}
+
+
+def totals_from_rows(rows: Sequence[Sequence[Any]]) -> Dict[str, float]:
+    """The same totals computed in NumPy from fetched rows (columns in ``COLUMNS`` order)."""
+    totals: Dict[str, float] = dict.fromkeys(TOTAL_KEYS, 0)
+    if not len(rows):
+        return totals
+    data = np.array([tuple(row) for row in rows], dtype=float).reshape(len(rows), len(COLUMNS))
+    raw_reading = data[:, COLUMNS.index('reading_speed')]
+    data = np.nan_to_num(data, nan=0.0)
+    col = {name: data[:, i] for i, name in enumerate(COLUMNS)}
+    time_spent = col['total_time_spent']
+    time_or_one = np.where(time_spent == 0, 1, time_spent)
+    score = col['engagement_score']
+    reading = ~np.isnan(raw_reading) & (raw_reading != 0)
+
+    totals.update({
+        'count': len(rows),
+        'total_time': time_spent.sum(),
+        'focus_time': col['focus_time'].sum(),
+        'scroll_depth': col['scroll_depth'].sum(),
+        'clicks': col['clicks'].sum(),
+        'max_clicks': col['clicks'].max(),
+        'cursor': col['cursor_movements'].sum(),
+        'max_cursor': col['cursor_movements'].max(),
+        'returns': col['return_count'].sum(),
+        'distractions': col['distraction_count'].sum(),
+        'reading_sum': col['reading_speed'][reading].sum(),
+        'reading_count': int(reading.sum()),
+        'focused': int((col['focus_time'] > time_or_one * FOCUSED_SHARE).sum()),
+        'distracted': int((col['distraction_count'] > DISTRACTED_COUNT).sum()),
+        'active': int((col['cursor_movements'] > ACTIVE_CURSOR).sum()),
+        'idle': int((col['idle_time'] > time_or_one * IDLE_SHARE).sum()),
+        'low_risk': int((score >= LOW_RISK_SCORE).sum()),
+        'medium_risk': int(((score >= MEDIUM_RISK_SCORE) & (score < LOW_RISK_SCORE)).sum()),
+        'high_risk': int((score < MEDIUM_RISK_SCORE).sum()),
+    })
+    for i in range(len(TIME_LABELS)):
+        in_bin = (time_spent >= i * TIME_BIN_SECONDS) & (time_spent < (i + 1) * TIME_BIN_SECONDS)
+        totals[f'bin{i}_count'] = int(in_bin.sum())
+        totals[f'bin{i}_score'] = score[in_bin].sum()
+    return {key: float(value) if isinstance(value, np.floating) else value for key, value in totals.items()}
+
+
+def metrics_from_totals(totals: Mapping[str, float]) -> Dict[str, Any]:
+    """Dashboard percentages (unrounded) from totals; expects ``totals['count'] > 0``."""
+    n = totals['count']
+    total_time = totals['total_time']
+    engagement_over_time = [
+        totals[f'bin{i}_score'] / totals[f'bin{i}_count'] if totals[f'bin{i}_count'] else 0
+        for i in range(len(TIME_LABELS))
+    ]
+    return {
+        'avg_focus_percentage': (totals['focus_time'] / max(total_time, 1)) * 100 if total_time > 0 else 0,
+        'avg_scroll_percentage': totals['scroll_depth'] / n,
+        # Click and cursor activity normalised against the busiest row
+        'avg_click_percentage': (totals['clicks'] / max(totals['max_clicks'] * n, 1)) * 100,
+        'avg_cursor_percentage': (totals['cursor'] / max(totals['max_cursor'] * n, 1)) * 100,
+        'avg_return_percentage': (totals['returns'] / max(totals['distractions'], 1)) * 100,
+        'avg_reading_percentage': (totals['reading_sum'] / max(totals['reading_count'], 1)) / READING_SPEED_MAX_WPM * 100,
+        'focus_percentage': totals['focused'] / n * 100,
+        'distraction_percentage': totals['distracted'] / n * 100,
+        'activity_percentage': totals['active'] / n * 100,
+        'idle_percentage': totals['idle'] / n * 100,
+        'time_labels': list(TIME_LABELS),
+        'engagement_over_time': engagement_over_time,
+        'low_risk_percentage': totals['low_risk'] / n * 100,
+        'medium_risk_percentage': totals['medium_risk'] / n * 100,
+        'high_risk_percentage': totals['high_risk'] / n * 100,
+    }
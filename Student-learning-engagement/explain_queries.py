@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Run EXPLAIN QUERY PLAN on the queries behind the main routes and flag full table scans.
+
+Each check replays the read queries a route issues against the configured database,
+records the SQL and prints SQLite's plan for it. The checks only read, but importing
+the app applies pending auto-migrations, including missing model indexes.
+
+    python explain_queries.py            # flagged queries only
+    python explain_queries.py --verbose  # every plan
+    python explain_queries.py --strict   # exit 1 when a full scan is flagged (for CI)
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from query_plan import record_statements, analyze_statements
+
+# Tables whose full scans are expected (small lookup tables, admin-wide listings)
+ALLOWED_SCANS = ()
+
+
+def _sample_ids(app_module):
+    """Real ids when the database has rows; plans do not depend on the values otherwise."""
+    m = app_module
+    student = m.Student.query.filter(m.Student.user_id.isnot(None)).first()
+    teacher = m.User.query.filter_by(role='teacher').first()
+    question = m.Question.query.first()
+    return {
+        'user_id': student.user_id if student else 1,
+        'student_id': student.id if student else 1,
+        'teacher_id': teacher.id if teacher else 1,
+        'resource_id': question.resource_id if question else 1,
+        'question_id': question.id if question else 1,
+    }
+
+
+def route_checks(app_module, ids):
+    m = app_module
+    db = m.db
+    since = datetime.now() - timedelta(hours=1)
+    return {
+        'student_dashboard': lambda: (
+            m.Student.query.filter_by(user_id=ids['user_id']).first(),
+            m.StudySession.query.filter_by(student_id=ids['student_id']).order_by(m.StudySession.start_time.desc()).all(),
+            m.StudentNotification.query.filter_by(student_id=ids['student_id'], is_read=False)
+                .order_by(m.StudentNotification.created_at.desc()).all(),
+            m.ResourceAssignment.query.filter_by(student_id=ids['student_id'], is_active=True).all(),
+        ),
+        'student_quiz': lambda: (
+            m.StudySession.query.filter_by(student_id=ids['student_id'], resource_id=ids['resource_id'], completed=False)
+                .order_by(m.StudySession.start_time.desc()).first(),
+            m.Question.query.filter_by(resource_id=ids['resource_id']).all(),
+            m.QuizMetadata.query.filter_by(resource_id=ids['resource_id']).first(),
+        ),
+        'submit_answer': lambda: (
+            m.StudentAnswer.query.filter_by(student_id=ids['student_id'], question_id=ids['question_id']).first(),
+            m.Question.query.filter_by(resource_id=ids['resource_id']).filter(m.Question.question_type == 'mcq').count(),
+            m.StudentAnswer.query.join(m.Question).filter(
+                m.StudentAnswer.student_id == ids['student_id'],
+                m.Question.resource_id == ids['resource_id'],
+                m.Question.question_type == 'mcq',
+                m.StudentAnswer.is_correct == True  # noqa: E712
+            ).count(),
+        ),
+        'track_activity': lambda: (
+            m.StudentActivity.query.filter(m.StudentActivity.student_id == ids['student_id'],
+                                           m.StudentActivity.timestamp >= since).count(),
+            m.ResourceEngagement.query.filter_by(student_id=ids['student_id'], resource_id=ids['resource_id'],
+                                                 session_id=None).first(),
+        ),
+        'teacher_dashboard': lambda: (
+            m.Student.query.filter(m.Student.grade.in_(
+                db.session.query(m.Student.grade).filter(m.Student.teacher_id == ids['teacher_id']).distinct())).all(),
+            db.session.get(m.TeacherSummary, ids['teacher_id']),
+            m.Resource.query.filter_by(created_by=ids['teacher_id'], is_deleted=False).all(),
+            m.TeacherNotification.query.filter_by(teacher_id=ids['teacher_id'], is_read=False)
+                .order_by(m.TeacherNotification.created_at.desc()).limit(20).all(),
+        ),
+        'teacher_student_progress': lambda: db.session.query(m.StudySession, m.Resource, m.ResourceEngagement)
+            .join(m.Resource, m.Resource.id == m.StudySession.resource_id)
+            .outerjoin(m.ResourceEngagement,
+                       (m.ResourceEngagement.session_id == m.StudySession.id) &
+                       (m.ResourceEngagement.student_id == m.StudySession.student_id) &
+                       (m.ResourceEngagement.resource_id == m.StudySession.resource_id))
+            .filter(m.StudySession.student_id.in_([ids['student_id']]))
+            .order_by(m.StudySession.student_id, m.StudySession.id).all(),
+        'teacher_insights': lambda: m._latest_sessions_by_student([ids['student_id']]),
+        'student_detailed_report': lambda: m.activity_history(ids['student_id']),
+        'quiz_results': lambda: (
+            m._quiz_attempt_statistics(ids['resource_id']),
+            m._quiz_question_analytics(ids['resource_id'], m.Question.query.filter_by(resource_id=ids['resource_id']).all(),
+                                       [(m.StudySession(completed=True), m.Student(id=ids['student_id']))]),
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--verbose', action='store_true', help='print every plan, not only flagged ones')
+    parser.add_argument('--strict', action='store_true', help='exit with status 1 if a full scan is flagged')
+    args = parser.parse_args()
+
+    import app as app_module
+
+    flagged_total = 0
+    with app_module.app.app_context():
+        engine = app_module.db.engine
+        ids = _sample_ids(app_module)
+        tables = set(app_module.db.metadata.tables)
+        connection = engine.raw_connection()
+        try:
+            for name, check in route_checks(app_module, ids).items():
+                with record_statements(engine) as statements:
+                    check()
+                report = analyze_statements(connection, statements, ALLOWED_SCANS, tables)
+                flagged = [entry for entry in report if entry['flagged']]
+                flagged_total += len(flagged)
+                print(f"{'✗' if flagged else '✓'} {name}: {len(report)} queries, {len(flagged)} with full scans")
+                for entry in report if args.verbose else flagged:
+                    print('    ' + ' '.join(entry['sql'].split())[:200])
+                    for detail in entry['plan']:
+                        print(f"      {detail}")
+        finally:
+            connection.close()
+    if args.strict and flagged_total:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
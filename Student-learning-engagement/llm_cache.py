@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Callable, Optional
+
+
+def make_cache_key(kind: str, *parts: Any) -> str:
+    """Build a cache key such as ``teacher_strategy:v1:12:7:8`` from its components."""
+    return ':'.join([kind] + ['-' if p is None else str(p) for p in parts])
+
+
+class LLMResponseCache:
+    """Persistent cache of generated LLM text in a local SQLite file.
+
+    Entries expire ``ttl_seconds`` after they were written. When more than ``max_entries``
+    are stored, the least recently used ones are evicted. The file is shared safely by
+    several gunicorn workers; every operation uses its own short-lived connection.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 5000):
+        self.path = path
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self._initialize()
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _initialize(self) -> None:
+        # Deferred to first use so importing the app does not create the file
+        with self._init_lock:
+            if self._initialized:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with closing(sqlite3.connect(self.path, timeout=10)) as conn, conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS llm_cache ('
+                    ' key TEXT PRIMARY KEY,'
+                    ' value TEXT NOT NULL,'
+                    ' created_at REAL NOT NULL,'
+                    ' last_used REAL NOT NULL)'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache (last_used)')
+            self._initialized = True
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute('SELECT value, created_at FROM llm_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[1] > self.ttl_seconds:
+                conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                self.misses += 1
+                return None
+            conn.execute('UPDATE llm_cache SET last_used = ? WHERE key = ?', (now, key))
+        self.hits += 1
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used) VALUES (?, ?, ?, ?)',
+                (key, value, now, now),
+            )
+            (count,) = conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    'DELETE FROM llm_cache WHERE key IN '
+                    '(SELECT key FROM llm_cache ORDER BY last_used ASC LIMIT ?)',
+                    (count - self.max_entries,),
+                )
+
+    def get_or_compute(self, key: str, compute_fn: Callable[[], Optional[str]]) -> Optional[str]:
+        """Return the cached value or compute, store and return it. ``None`` results are not cached."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = compute_fn()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Drop every entry whose key starts with ``prefix``; returns the number removed."""
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("DELETE FROM llm_cache WHERE key LIKE ? ESCAPE '\\'", (escaped + '%',)).rowcount
+
+    def purge_expired(self) -> int:
+        with closing(self._connect()) as conn, conn:
+            return conn.execute('DELETE FROM llm_cache WHERE created_at < ?', (time.time() - self.ttl_seconds,)).rowcount
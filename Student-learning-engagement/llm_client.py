@@ -0,0 +1,198 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from types import SimpleNamespace
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the API while the circuit breaker is open."""
+
+
+class RateLimitedError(RuntimeError):
+    """Raised when no rate-limit token became available within the call timeout."""
+
+
+class StubLLMClient:
+    """Offline stand-in for ``OpenAI()`` exposing ``chat.completions.create``.
+
+    Replies are deterministic (built from the prompt) so the app, background jobs and
+    tests can run without an API key. ``delay`` simulates API latency; while ``fail`` is
+    set every call raises, to exercise the fallback paths.
+    """
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = float(delay)
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str = '', messages: Optional[List[Dict[str, str]]] = None, **kwargs: Any) -> Any:
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError('stub LLM client configured to fail')
+        prompt = (messages or [{}])[-1].get('content', '')
+        lines = [line.strip() for line in prompt.splitlines() if line.strip()]
+        summary = lines[0] if lines else 'No prompt given.'
+        content = f"[offline] {summary[:160]}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: ``rate`` tokens per second, bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available; otherwise return seconds until the next one."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate if self.rate > 0 else float('inf')
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire()
+            if wait == 0.0:
+                return True
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens when at least ``failure_ratio`` of the last ``window`` calls failed.
+
+    While open every call is refused for ``cooldown`` seconds; then one trial call is let
+    through (half-open), which closes the circuit on success or re-opens it on failure.
+    """
+
+    def __init__(self, failure_ratio: float = 0.5, window: int = 20, min_calls: int = 5,
+                 cooldown: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_ratio = float(failure_ratio)
+        self.min_calls = int(min_calls)
+        self.cooldown = float(cooldown)
+        self._clock = clock
+        self._outcomes: Deque[bool] = deque(maxlen=int(window))
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'half_open' if self._clock() - self._opened_at >= self.cooldown else 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at < self.cooldown or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def release(self) -> None:
+        """Give back a trial slot taken by ``allow`` for a call that was never made."""
+        with self._lock:
+            self._trial_running = False
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                if not self._trial_running:
+                    return  # a call that started before the circuit opened
+                self._trial_running = False
+                if success:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = self._clock()
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures >= self.failure_ratio * len(self._outcomes):
+                self._opened_at = self._clock()
+
+
+class ResilientLLMClient:
+    """Wraps a client exposing ``chat.completions.create`` with production safeguards.
+
+    Calls run on a bounded thread pool (``max_concurrency``), wait for a rate-limit token,
+    are abandoned after ``timeout`` seconds and are retried ``max_retries`` times with
+    jittered exponential backoff (timeouts are not retried, so a slow API cannot hold a
+    worker for several timeouts). A circuit breaker refuses calls outright while the API
+    is failing. Every failure surfaces as an exception, so callers keep their existing
+    offline fallback text.
+    """
+
+    def __init__(self, client: Any, max_concurrency: int = 4, rate_per_second: float = 2.0,
+                 burst: float = 4.0, timeout: float = 20.0, max_retries: int = 2,
+                 backoff_base: float = 0.5, breaker: Optional[CircuitBreaker] = None):
+        self.client = client
+        self.timeout = float(timeout)
+        self.max_retries = int(max_retries)
+        self.backoff_base = float(backoff_base)
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.breaker = breaker or CircuitBreaker()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(max_concurrency)), thread_name_prefix='llm-call')
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _attempt(self, kwargs: Dict[str, Any], deadline: float) -> Any:
+        if not self.breaker.allow():
+            raise CircuitOpenError('LLM circuit breaker is open')
+        remaining = deadline - time.monotonic()
+        if not self.bucket.acquire(max(remaining, 0.0)):
+            self.breaker.release()
+            raise RateLimitedError('LLM rate limit: no capacity before the call timeout')
+        future = self._pool.submit(self.client.chat.completions.create, **kwargs)
+        try:
+            result = future.result(timeout=max(deadline - time.monotonic(), 0.0))
+        except FutureTimeoutError:
+            future.cancel()  # drops it if it never left the queue
+            self.breaker.record(False)
+            raise TimeoutError(f'LLM call exceeded {self.timeout:.0f}s')
+        except Exception:
+            self.breaker.record(False)
+            raise
+        self.breaker.record(True)
+        return result
+
+    def create(self, **kwargs: Any) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(kwargs, time.monotonic() + self.timeout)
+            except (CircuitOpenError, RateLimitedError, TimeoutError):
+                raise
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+            time.sleep(random.uniform(0.5, 1.5) * self.backoff_base * (2 ** attempt))
+            attempt += 1
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
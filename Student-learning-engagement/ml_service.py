@@ -1,20 +1,99 @@
 import os
 import json
-from typing import Dict, Any, List, Tuple
+import tempfile
+import threading
+import time
+from typing import Dict, Any, List, Tuple, Optional, Callable, Iterable
 from math import exp
 from datetime import datetime
 
+import numpy as np
+
 MODEL_PATH = 'models/model.json'
 
+# Above this many samples training switches from full-batch gradient descent to
+# shuffled mini-batch SGD with a lower epoch cap (early stopping usually ends it sooner)
+MINIBATCH_THRESHOLD = 50000
+MINIBATCH_SIZE = 1024
+MINIBATCH_MAX_EPOCHS = 200
+
+# Online learning: each finalized session applies one SGD step to the in-memory model;
+# weights are checkpointed as a new registry version every N updates or T seconds, whichever first
+ONLINE_LEARNING_RATE = float(os.getenv('ML_ONLINE_LEARNING_RATE', '0.05'))
+ONLINE_CHECKPOINT_EVERY = int(os.getenv('ML_ONLINE_CHECKPOINT_EVERY', '50'))
+ONLINE_CHECKPOINT_SECONDS = float(os.getenv('ML_ONLINE_CHECKPOINT_SECONDS', '300'))
+ONLINE_SOURCE = 'online'  # registry 'source' of online checkpoints
+
+# Model registry: every saved model is kept as <model dir>/registry/<version>.json together
+# with its training metadata, and registry/active.json names the version readers use.
+# MODEL_PATH mirrors the active artifact for anything that still reads it directly.
+# The newest MODEL_REGISTRY_KEEP trained versions are kept; online checkpoints are only
+# kept while active and are never rollback targets, so they cannot push trained versions out.
+MODEL_REGISTRY_KEEP = int(os.getenv('ML_MODEL_REGISTRY_KEEP', '20'))
+_registry_lock = threading.Lock()
+
+# Process-wide cache of the deserialized model: (active pointer key, model, version).
+# Replaced as a whole tuple so lock-free readers never see a mismatched pair.
+_model_cache_lock = threading.Lock()
+_model_cache: Tuple[Any, Optional['SimpleLogisticModel'], Optional[str]] = (None, None, None)
+
+# Online updates applied since the last checkpoint (guarded by _online_lock)
+_online_lock = threading.Lock()
+_online_state: Dict[str, Any] = {'pending': 0, 'total': 0, 'last_checkpoint': time.monotonic()}
+
 
 def ensure_model_dir_exists() -> None:
-    os.makedirs('models', exist_ok=True)
+    os.makedirs(os.path.dirname(MODEL_PATH) or '.', exist_ok=True)
+
+
+def _registry_dir() -> str:
+    return os.path.join(os.path.dirname(MODEL_PATH) or '.', 'registry')
+
+
+def _active_pointer_path() -> str:
+    return os.path.join(_registry_dir(), 'active.json')
+
+
+def _artifact_path(version: str) -> str:
+    if not version or not all(c.isalnum() or c in '-_' for c in version):
+        raise ValueError(f'Invalid model version: {version!r}')
+    return os.path.join(_registry_dir(), f'{version}.json')
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    """Write JSON to a temp file in the same directory and rename it over ``path``,
+    so readers see either the old or the new file, never a partial one."""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.model-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _file_key(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
 
 
 class SimpleLogisticModel:
     def __init__(self, weights: List[float] | None = None, bias: float = 0.0):
-        self.weights = weights if weights is not None else [0.0, 0.0, 0.0]
+        self.weights = [float(w) for w in weights] if weights is not None else [0.0, 0.0, 0.0]
         self.bias = float(bias)
+        # Filled in by fit(): epochs actually run and final mean log-loss
+        self.epochs_run = 0
+        self.loss = None
 
     @staticmethod
     def _sigmoid(z: float) -> float:
@@ -23,40 +102,92 @@ class SimpleLogisticModel:
         except OverflowError:
             return 0.0 if z < 0 else 1.0
 
+    @staticmethod
+    def _sigmoid_array(z: np.ndarray) -> np.ndarray:
+        # tanh form is numerically stable for large |z| (no overflow warnings)
+        return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+    @staticmethod
+    def _log_loss(p: np.ndarray, y: np.ndarray) -> float:
+        p = np.clip(p, 1e-12, 1.0 - 1e-12)
+        return float(-np.mean(y * np.log(p) + (1.0 - y) * np.log(1.0 - p)))
+
+    def predict_proba_array(self, X: Any) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.size == 0:
+            return np.zeros(0, dtype=np.float64)
+        return self._sigmoid_array(X @ np.asarray(self.weights, dtype=np.float64) + self.bias)
+
     def predict_proba(self, X: List[List[float]]) -> List[float]:
-        probs: List[float] = []
-        for row in X:
-            z = sum(w * x for w, x in zip(self.weights, row)) + self.bias
-            probs.append(self._sigmoid(z))
-        return probs
-
-    def fit(self, X: List[List[float]], y: List[float], lr: float = 0.05, epochs: int = 1000):
-        if not X:
+        return self.predict_proba_array(X).tolist()
+
+    def fit(self, X: Any, y: Any, lr: float = 0.05, epochs: int = 1000,
+            batch_size: Optional[int] = None, tol: float = 1e-7, seed: int = 0):
+        """Gradient-descent fit on float64 arrays.
+
+        Full-batch by default; pass ``batch_size`` for shuffled mini-batch SGD on large
+        datasets. Stops early once the epoch-to-epoch change in log-loss falls below ``tol``
+        (``tol=0`` always runs every epoch).
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if X.size == 0:
             return
-        m = len(X)
-        n = len(X[0])
-        w = self.weights[:]
-        b = self.bias
-        for _ in range(epochs):
-            # compute predictions
-            preds = []
-            for row in X:
-                z = sum(w[j] * row[j] for j in range(n)) + b
-                preds.append(self._sigmoid(z))
-            # gradients
-            dw = [0.0] * n
-            db = 0.0
-            for i in range(m):
-                err = preds[i] - y[i]
-                for j in range(n):
-                    dw[j] += (1.0 / m) * err * X[i][j]
-                db += (1.0 / m) * err
-            # update
-            for j in range(n):
-                w[j] -= lr * dw[j]
-            b -= lr * db
-        self.weights = w
+        m, n = X.shape
+        w = np.zeros(n, dtype=np.float64)
+        w[:min(n, len(self.weights))] = self.weights[:n]
+        b = float(self.bias)
+        rng = np.random.default_rng(seed)
+        prev_loss = None
+        epoch = 0
+        for epoch in range(1, epochs + 1):
+            if batch_size and batch_size < m:
+                # Shuffle once per epoch, then walk contiguous slices (views, no copies)
+                order = rng.permutation(m)
+                Xs, ys = X[order], y[order]
+                for start in range(0, m, batch_size):
+                    xb, yb = Xs[start:start + batch_size], ys[start:start + batch_size]
+                    err = self._sigmoid_array(xb @ w + b) - yb
+                    w -= lr * (xb.T @ err) / len(yb)
+                    b -= lr * float(err.mean())
+                preds = self._sigmoid_array(X @ w + b)
+            else:
+                preds = self._sigmoid_array(X @ w + b)
+                err = preds - y
+                w -= lr * (X.T @ err) / m
+                b -= lr * float(err.mean())
+            # Loss is checked on the pre-update predictions in full-batch mode, which is
+            # one step behind but saves a second pass over the data
+            loss = self._log_loss(preds, y)
+            if tol and prev_loss is not None and abs(prev_loss - loss) < tol:
+                break
+            prev_loss = loss
+        self.weights = w.tolist()
+        self.bias = b
+        self.epochs_run = epoch
+        self.loss = self._log_loss(self._sigmoid_array(X @ w + b), y)
+
+    def partial_fit(self, X: Any, y: Any, lr: float = 0.1, batch_size: int = MINIBATCH_SIZE,
+                    rng: Optional[np.random.Generator] = None) -> float:
+        """One shuffled mini-batch SGD pass over a chunk; returns the chunk's pre-update log-loss."""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        m = len(y)
+        if m == 0:
+            return 0.0
+        w = np.asarray(self.weights, dtype=np.float64)
+        b = float(self.bias)
+        loss = self._log_loss(self._sigmoid_array(X @ w + b), y)
+        order = (rng or np.random.default_rng()).permutation(m)
+        Xs, ys = X[order], y[order]
+        for start in range(0, m, batch_size):
+            xb, yb = Xs[start:start + batch_size], ys[start:start + batch_size]
+            err = self._sigmoid_array(xb @ w + b) - yb
+            w -= lr * (xb.T @ err) / len(yb)
+            b -= lr * float(err.mean())
+        self.weights = w.tolist()
         self.bias = b
+        return loss
 
     def to_dict(self) -> Dict[str, Any]:
         return {'weights': self.weights, 'bias': self.bias}
@@ -99,67 +230,411 @@ def get_features_and_target(records: List[Dict[str, Any]]) -> Tuple[List[List[fl
     return X, y
 
 
+def normalize_rows_into(rows: List[Tuple[Any, Any, Any]], X_out: np.ndarray, y_out: np.ndarray) -> int:
+    """Normalize (duration, quiz_score, completed) tuples into preallocated buffers.
+
+    Same features and success label as build_records/_normalize_row, computed column-wise.
+    Returns the number of rows written; X_out/y_out must hold at least len(rows).
+    """
+    n = len(rows)
+    if n == 0:
+        return 0
+    raw = np.array([(r[0] or 0.0, r[1] or 0.0, 1.0 if r[2] else 0.0) for r in rows], dtype=np.float64)
+    X = X_out[:n]
+    np.clip(raw[:, 0] / 120.0, 0.0, 1.0, out=X[:, 0])
+    np.clip(raw[:, 1] / 100.0, 0.0, 1.0, out=X[:, 1])
+    X[:, 2] = raw[:, 2]
+    y_out[:n] = ((raw[:, 1] >= 70.0) & (raw[:, 2] == 1.0)).astype(np.float64)
+    return n
+
+
+def _stream_fit(chunk_source: Callable[[], Iterable[List[Tuple[Any, Any, Any]]]], X_buf: np.ndarray,
+                y_buf: np.ndarray, lr: float, epochs: int, tol: float,
+                limit: Optional[int] = None) -> Tuple[SimpleLogisticModel, int, float]:
+    """Fit on the first ``limit`` rows (all rows by default); returns (model, samples, positives).
+
+    A single-class history gets the fixed fallback model used by train_model.
+    """
+    chunk_size = len(y_buf)
+    model = SimpleLogisticModel()
+    rng = np.random.default_rng(0)
+    samples = 0
+    positives = 0.0
+    small_parts: List[Tuple[np.ndarray, np.ndarray]] = []
+    prev_loss = None
+    for epoch in range(1, max(1, epochs) + 1):
+        epoch_loss = 0.0
+        seen = 0
+        for rows in chunk_source():
+            for start in range(0, len(rows), chunk_size):
+                if limit is not None and seen >= limit:
+                    break
+                n = normalize_rows_into(rows[start:start + chunk_size], X_buf, y_buf)
+                if limit is not None:
+                    n = min(n, limit - seen)
+                if n == 0:
+                    continue
+                if epoch == 1:
+                    samples += n
+                    positives += float(y_buf[:n].sum())
+                    # Keep rows while they still fit in one chunk: a small history is
+                    # trained in full-batch mode below
+                    if samples <= chunk_size:
+                        small_parts.append((X_buf[:n].copy(), y_buf[:n].copy()))
+                    else:
+                        small_parts = []
+                epoch_loss += model.partial_fit(X_buf[:n], y_buf[:n], lr=lr, rng=rng) * n
+                seen += n
+            if limit is not None and seen >= limit:
+                break
+        if epoch == 1:
+            if samples == 0:
+                return model, 0, 0.0
+            if positives == 0.0 or positives == samples:
+                return SimpleLogisticModel(weights=[0.2, 0.7, 0.1], bias=-0.5 if positives == 0.0 else 0.5), samples, positives
+            if samples <= chunk_size:
+                # Small history: identical to the in-memory trainer
+                model = SimpleLogisticModel()
+                model.fit(np.concatenate([p[0] for p in small_parts]), np.concatenate([p[1] for p in small_parts]),
+                          lr=lr, epochs=1500)
+                return model, samples, positives
+        loss = epoch_loss / max(seen, 1)
+        if prev_loss is not None and abs(prev_loss - loss) < tol:
+            break
+        prev_loss = loss
+    return model, samples, positives
+
+
+def train_model_streaming(chunk_source: Callable[[], Iterable[List[Tuple[Any, Any, Any]]]],
+                          chunk_size: int = 5000, lr: float = 0.1,
+                          epochs: int = MINIBATCH_MAX_EPOCHS, tol: float = 1e-4) -> Dict[str, Any]:
+    """Train from chunks of (duration, quiz_score, completed) rows without materializing the history.
+
+    ``chunk_source`` must return a fresh iterator on every call; it is re-read once per epoch,
+    so memory is bounded by ``chunk_size`` rather than table size. A history that fits in a
+    single chunk is trained exactly like train_model (full-batch, 1500 epochs).
+    """
+    ensure_model_dir_exists()
+    started = time.monotonic()
+    X_buf = np.empty((chunk_size, 3), dtype=np.float64)
+    y_buf = np.empty(chunk_size, dtype=np.float64)
+
+    model, samples, positives = _stream_fit(chunk_source, X_buf, y_buf, lr, epochs, tol)
+    if samples == 0:
+        save_model(model, _training_metadata(model, 0, None, 0, started))
+        return {'status': 'no_data', 'samples': 0}
+    if positives == 0.0 or positives == samples:
+        save_model(model, _training_metadata(model, samples, None, 0, started))
+        return {'status': 'trained', 'samples': samples, 'accuracy': None}
+
+    # Holdout estimate: a copy fitted on the first 80% of rows is scored on the last 20%,
+    # both streamed like training
+    acc = None
+    total = 0
+    if samples >= 10:
+        split = int(0.8 * samples)
+        eval_model, _, _ = _stream_fit(chunk_source, X_buf, y_buf, lr, epochs, tol, limit=split)
+        index = 0
+        correct = 0
+        for rows in chunk_source():
+            for start in range(0, len(rows), chunk_size):
+                n = normalize_rows_into(rows[start:start + chunk_size], X_buf, y_buf)
+                lo = max(split - index, 0)
+                if lo < n:
+                    preds = eval_model.predict_proba_array(X_buf[lo:n]) >= 0.5
+                    correct += int((preds == (y_buf[lo:n] == 1.0)).sum())
+                    total += n - lo
+                index += n
+        acc = float(correct) / float(total) if total else None
+
+    save_model(model, _training_metadata(model, samples, acc, total, started))
+    return {'status': 'trained', 'samples': samples, 'accuracy': acc}
+
+
+def _training_metadata(model: SimpleLogisticModel, samples: int, accuracy: Optional[float],
+                       holdout_samples: int, started: float) -> Dict[str, Any]:
+    return {
+        'source': 'full_retrain',
+        'training_samples': samples,
+        'holdout_samples': holdout_samples,
+        'accuracy': accuracy,
+        'epochs_run': model.epochs_run,
+        'loss': model.loss,
+        'training_duration_seconds': round(time.monotonic() - started, 3),
+    }
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _read_active_pointer() -> Dict[str, Any]:
+    try:
+        return _read_json(_active_pointer_path())
+    except FileNotFoundError:
+        return {'version': None, 'history': []}
+
+
+def _history_after(pointer: Dict[str, Any], version: str) -> List[str]:
+    """Rollback history once ``version`` replaces the pointer's active version.
+
+    Online checkpoints are not rollback targets: rolling back from one (or from whatever
+    replaced it) returns to the last trained or promoted version.
+    """
+    history = list(pointer.get('history') or [])
+    if pointer.get('version') and pointer['version'] != version and pointer.get('source') != ONLINE_SOURCE:
+        history.append(pointer['version'])
+    return history
+
+
+def _set_active_locked(version: str, history: List[str], artifact: Dict[str, Any]) -> Dict[str, Any]:
+    """Point readers at ``version`` and return the pointer written. Caller holds ``_registry_lock``."""
+    global _model_cache
+    pointer = {
+        'version': version,
+        'source': artifact.get('source'),
+        'history': history[-MODEL_REGISTRY_KEEP:],
+        'activated_at': datetime.now().isoformat(),
+    }
+    _write_json_atomic(_active_pointer_path(), pointer)
+    _write_json_atomic(MODEL_PATH, artifact)
+    with _model_cache_lock:
+        _model_cache = (('active', _file_key(_active_pointer_path())), SimpleLogisticModel.from_dict(artifact), version)
+    # The newly active model supersedes any online updates not yet checkpointed
+    _online_state['pending'] = 0
+    _online_state['last_checkpoint'] = time.monotonic()
+    return pointer
+
+
+def _prune_registry_locked(pointer: Dict[str, Any]) -> None:
+    """Delete superseded online checkpoints and trained versions beyond the newest
+    MODEL_REGISTRY_KEEP, except the active version and its rollback history."""
+    keep = {pointer.get('version')} | set(pointer.get('history') or [])
+    trained = 0
+    for info in list_model_versions():
+        if info.get('source') != ONLINE_SOURCE:
+            trained += 1
+            if trained <= MODEL_REGISTRY_KEEP:
+                continue
+        if info['version'] not in keep:
+            try:
+                os.remove(_artifact_path(info['version']))
+            except OSError:
+                pass
+
+
+def save_model(model: SimpleLogisticModel, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """Register the model as a new version, make it active and cache it for this process.
+
+    Returns the new version id. Artifacts are never modified after they are written, so a
+    version can be promoted again later with promote_model_version().
+    """
+    ensure_model_dir_exists()
+    os.makedirs(_registry_dir(), exist_ok=True)
+    data = model.to_dict()
+    data.update(metadata or {})
+    data.setdefault('last_updated', datetime.now().isoformat())
+    version = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{os.getpid()}"
+    data['version'] = version
+    with _registry_lock:
+        _write_json_atomic(_artifact_path(version), data)
+        pointer = _read_active_pointer()
+        _prune_registry_locked(_set_active_locked(version, _history_after(pointer, version), data))
+    return version
+
+
+def list_model_versions() -> List[Dict[str, Any]]:
+    """Registered versions, newest first, with their metadata (weights omitted)."""
+    active = _read_active_pointer().get('version')
+    versions = []
+    try:
+        names = os.listdir(_registry_dir())
+    except FileNotFoundError:
+        return []
+    for name in sorted(names, reverse=True):
+        if not name.endswith('.json') or name == 'active.json':
+            continue
+        try:
+            data = _read_json(os.path.join(_registry_dir(), name))
+        except (OSError, ValueError):
+            continue
+        info = {k: v for k, v in data.items() if k not in ('weights', 'bias')}
+        info['version'] = name[:-len('.json')]
+        info['active'] = info['version'] == active
+        versions.append(info)
+    return versions
+
+
+def promote_model_version(version: str) -> Dict[str, Any]:
+    """Make a registered version active. Other processes pick it up on their next load_model()."""
+    with _registry_lock:
+        try:
+            artifact = _read_json(_artifact_path(version))
+        except FileNotFoundError:
+            raise ValueError(f'Unknown model version: {version}')
+        _set_active_locked(version, _history_after(_read_active_pointer(), version), artifact)
+    return {'status': 'promoted', 'version': version}
+
+
+def rollback_model() -> Dict[str, Any]:
+    """Re-activate the version that was active before the current one."""
+    with _registry_lock:
+        pointer = _read_active_pointer()
+        history = list(pointer.get('history') or [])
+        while history:
+            previous = history.pop()
+            try:
+                artifact = _read_json(_artifact_path(previous))
+            except FileNotFoundError:
+                continue  # pruned
+            _set_active_locked(previous, history, artifact)
+            return {'status': 'rolled_back', 'version': previous, 'replaced': pointer.get('version')}
+    raise ValueError('No earlier model version to roll back to')
+
+
+def _fit_model(X: List[List[float]], y: List[float]) -> SimpleLogisticModel:
+    """Fit a model on in-memory rows; a single-class target gets a fixed fallback model."""
+    if all(v == 0.0 for v in y) or all(v == 1.0 for v in y):
+        return SimpleLogisticModel(weights=[0.2, 0.7, 0.1], bias=-0.5 if all(v == 0.0 for v in y) else 0.5)
+    model = SimpleLogisticModel()
+    if len(X) > MINIBATCH_THRESHOLD:
+        model.fit(X, y, lr=0.1, epochs=MINIBATCH_MAX_EPOCHS, batch_size=MINIBATCH_SIZE, tol=1e-4)
+    else:
+        model.fit(X, y, lr=0.1, epochs=1500)
+    return model
+
+
 def train_model(study_sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
     ensure_model_dir_exists()
     records = build_records(study_sessions)
     X, y = get_features_and_target(records)
     model = SimpleLogisticModel()
+    started = time.monotonic()
 
     if not X:
-        with open(MODEL_PATH, 'w', encoding='utf-8') as f:
-            json.dump(model.to_dict(), f)
+        save_model(model, _training_metadata(model, 0, None, 0, started))
         return {'status': 'no_data', 'samples': 0}
 
-    all_zero = all(v == 0.0 for v in y)
-    all_one = all(v == 1.0 for v in y)
-    if all_zero or all_one:
-        w = [0.2, 0.7, 0.1]
-        b = -0.5 if all_zero else 0.5
-        model = SimpleLogisticModel(weights=w, bias=b)
-    else:
-        model.fit(X, y, lr=0.1, epochs=1500)
-
-    with open(MODEL_PATH, 'w', encoding='utf-8') as f:
-        json.dump(model.to_dict(), f)
+    single_class = all(v == 0.0 for v in y) or all(v == 1.0 for v in y)
+    model = _fit_model(X, y)
 
-    # Simple holdout estimate when enough samples
+    # Holdout estimate when enough samples: a copy fitted on the first 80% of rows is
+    # scored on the remaining 20%, which the final model's own fit has seen
     acc = None
-    if len(X) >= 10 and not (all_zero or all_one):
+    test_y = []
+    if len(X) >= 10 and not single_class:
         split = int(0.8 * len(X))
         train_X, train_y = X[:split], y[:split]
         test_X, test_y = X[split:], y[split:]
-        eval_model = SimpleLogisticModel.from_dict(model.to_dict())
-        # Evaluate using current model (no re-fit)
+        eval_model = _fit_model(train_X, train_y)
         preds = eval_model.predict_proba(test_X)
         preds_cls = [1.0 if p >= 0.5 else 0.0 for p in preds]
         correct = sum(1 for a, b in zip(preds_cls, test_y) if a == b)
         acc = float(correct) / float(len(test_y)) if test_y else None
 
+    save_model(model, _training_metadata(model, len(X), acc, len(test_y), started))
     return {'status': 'trained', 'samples': len(X), 'accuracy': acc}
 
 
+def _active_source() -> Tuple[Any, Optional[str]]:
+    """(cache key, path) of the model readers should use: the registry's active version,
+    or MODEL_PATH for a model directory that predates the registry."""
+    key = _file_key(_active_pointer_path())
+    if key is not None:
+        version = _read_active_pointer().get('version')
+        return ('active', key), _artifact_path(version) if version else None
+    key = _file_key(MODEL_PATH)
+    return (('file', key), MODEL_PATH) if key is not None else (None, None)
+
+
 def load_model() -> SimpleLogisticModel:
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError('Model file not found. Train the model first.')
-    with open(MODEL_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    return SimpleLogisticModel.from_dict(data)
+    """Return the active model, resolving the registry pointer again only when it changed."""
+    global _model_cache
+    cached_key, cached_model, _ = _model_cache
+    if cached_model is not None and cached_key is not None:
+        if cached_key[0] == 'active':
+            current = ('active', _file_key(_active_pointer_path()))
+        else:
+            current = ('file', _file_key(MODEL_PATH))
+        if current == cached_key:
+            return cached_model
+    with _model_cache_lock:
+        key, path = _active_source()
+        if path is None:
+            raise FileNotFoundError('Model file not found. Train the model first.')
+        data = _read_json(path)
+        model = SimpleLogisticModel.from_dict(data)
+        # If the pointer moved while we read, the next call resolves it again
+        _model_cache = (key if _active_source()[0] == key else None, model, data.get('version'))
+        return model
 
 
-def recommend_for_student(study_summary: Dict[str, Any]) -> Dict[str, Any]:
-    duration = float(study_summary.get('duration') or 0.0)
-    quiz_score = float(study_summary.get('quiz_score') or 0.0)
-    completed = 1.0 if study_summary.get('completed') else 0.0
-    features = [_normalize_row(duration, quiz_score, completed)]
+def update_model_online(duration: float, quiz_score: float, completed: bool,
+                        lr: Optional[float] = None) -> Dict[str, Any]:
+    """Apply one SGD step for a newly finalized study session.
 
-    try:
-        model = load_model()
-        proba = model.predict_proba(features)[0]
-    except Exception:
-        # Fallback heuristic
-        base = 0.7 * min(max(quiz_score / 100.0, 0.0), 1.0) + 0.2 * min(max(duration / 120.0, 0.0), 1.0) + 0.1 * completed
-        proba = float(min(max(base, 0.0), 1.0))
+    The updated model replaces the cached one immediately (readers get a new object, never a
+    half-updated one) and is checkpointed to the registry periodically. If another process
+    activates a different version (e.g. the full retrain that corrects drift, or an admin
+    rollback), unsaved online steps are dropped in favour of that model on the next load.
+    """
+    global _model_cache
+    x = np.asarray([_normalize_row(float(duration or 0.0), float(quiz_score or 0.0), 1.0 if completed else 0.0)])
+    y = np.asarray([1.0 if (float(quiz_score or 0.0) >= 70.0 and completed) else 0.0])
+    with _online_lock:
+        try:
+            current = load_model()
+        except FileNotFoundError:
+            # Nothing on disk yet: continue from earlier unsaved online steps, if any
+            current = _model_cache[1] or SimpleLogisticModel()
+        updated = SimpleLogisticModel(weights=current.weights, bias=current.bias)
+        updated.partial_fit(x, y, lr=ONLINE_LEARNING_RATE if lr is None else lr, batch_size=1)
+        with _model_cache_lock:
+            key, _, version = _model_cache
+            _model_cache = (key if key is not None else _active_source()[0], updated, version)
+        _online_state['pending'] += 1
+        _online_state['total'] += 1
+        due = (_online_state['pending'] >= ONLINE_CHECKPOINT_EVERY
+               or time.monotonic() - _online_state['last_checkpoint'] >= ONLINE_CHECKPOINT_SECONDS)
+        if due:
+            _checkpoint_locked(updated)
+        return {'status': 'updated', 'checkpointed': due, 'online_updates': _online_state['total']}
+
+
+def _checkpoint_locked(model: SimpleLogisticModel) -> None:
+    save_model(model, {'source': ONLINE_SOURCE, 'parent_version': _model_cache[2],
+                       'online_updates': _online_state['total']})
+
+
+def checkpoint_online_model() -> bool:
+    """Write pending online updates to disk now (e.g. at shutdown). Returns True if anything was saved."""
+    with _online_lock:
+        if not _online_state['pending']:
+            return False
+        model = _model_cache[1]
+        if model is None:
+            return False
+        _checkpoint_locked(model)
+        return True
+
+
+def get_cached_model_version() -> Optional[str]:
+    return _model_cache[2]
+
+
+def get_active_model_version() -> Optional[str]:
+    """Version the registry currently points readers at (None before the first save)."""
+    return _read_active_pointer().get('version')
 
+
+def invalidate_model_cache() -> None:
+    global _model_cache
+    with _model_cache_lock:
+        _model_cache = (None, None, None)
+
+
+def _recommendation(proba: float, timestamp: str) -> Dict[str, Any]:
     if proba >= 0.8:
         action = 'advance'
         strategy = 'Assign more challenging resources and a new assignment.'
@@ -174,23 +649,54 @@ def recommend_for_student(study_summary: Dict[str, Any]) -> Dict[str, Any]:
         'success_probability': float(proba),
         'recommended_action': action,
         'strategy': strategy,
-        'timestamp': datetime.now().strftime('%B %d, %Y at %I:%M %p'),
+        'timestamp': timestamp,
         'confidence_level': 'High' if proba >= 0.8 or proba <= 0.2 else 'Medium' if proba >= 0.6 or proba <= 0.4 else 'Low'
     }
 
 
+def recommend_for_students(study_summaries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Recommendations for many study summaries (same order), scored in one predict call."""
+    if not study_summaries:
+        return []
+    raw = np.empty((len(study_summaries), 3), dtype=np.float64)
+    for i, summary in enumerate(study_summaries):
+        raw[i, 0] = float(summary.get('duration') or 0.0)
+        raw[i, 1] = float(summary.get('quiz_score') or 0.0)
+        raw[i, 2] = 1.0 if summary.get('completed') else 0.0
+
+    try:
+        model = load_model()
+        X = np.column_stack((np.clip(raw[:, 0] / 120.0, 0.0, 1.0), np.clip(raw[:, 1] / 100.0, 0.0, 1.0), raw[:, 2]))
+        probas = model.predict_proba_array(X)
+    except Exception:
+        # Fallback heuristic
+        base = 0.7 * np.clip(raw[:, 1] / 100.0, 0.0, 1.0) + 0.2 * np.clip(raw[:, 0] / 120.0, 0.0, 1.0) + 0.1 * raw[:, 2]
+        probas = np.clip(base, 0.0, 1.0)
+
+    timestamp = datetime.now().strftime('%B %d, %Y at %I:%M %p')
+    return [_recommendation(float(p), timestamp) for p in probas]
+
+
+def recommend_for_student(study_summary: Dict[str, Any]) -> Dict[str, Any]:
+    return recommend_for_students([study_summary])[0]
+
+
 def get_model_info() -> Dict[str, Any]:
     """Get information about the current model status"""
     try:
         ensure_model_dir_exists()
-        if os.path.exists(MODEL_PATH):
-            with open(MODEL_PATH, 'r') as f:
-                data = json.load(f)
+        _, path = _active_source()
+        if path is not None:
+            data = _read_json(path)
             return {
                     'status': 'trained',
+                    'version': data.get('version'),
+                    'source': data.get('source', 'unknown'),
                     'last_updated': data.get('last_updated', 'unknown'),
                     'training_samples': data.get('training_samples', 0),
-                    'accuracy': data.get('accuracy', 0.0)
+                    'holdout_samples': data.get('holdout_samples', 0),
+                    'accuracy': data.get('accuracy', 0.0),
+                    'training_duration_seconds': data.get('training_duration_seconds'),
                 }
         else:
             return {'status': 'not_trained', 'training_samples': 0}
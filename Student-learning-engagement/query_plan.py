@@ -0,0 +1,70 @@
+import re
+from contextlib import contextmanager
+from typing import Any, Collection, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# "SCAN student_activity" (SQLite >= 3.36) or "SCAN TABLE student_activity" (older).
+# "SCAN t USING COVERING INDEX ix" walks a whole index rather than the table.
+_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+
+
+def explain_query_plan(dbapi_connection: Any, statement: str, parameters: Sequence[Any] = ()) -> List[str]:
+    """SQLite's EXPLAIN QUERY PLAN detail lines for ``statement``."""
+    cursor = dbapi_connection.cursor()
+    try:
+        rows = cursor.execute('EXPLAIN QUERY PLAN ' + statement, tuple(parameters or ())).fetchall()
+    finally:
+        cursor.close()
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Tables the plan reads in full (index-only scans are not counted)."""
+    tables = []
+    for detail in plan:
+        match = _SCAN_RE.match(detail)
+        if match and 'INDEX' not in detail:
+            tables.append(match.group(1))
+    return tables
+
+
+@contextmanager
+def record_statements(engine: Any) -> Iterator[List[Tuple[str, Any]]]:
+    """Collect (SQL, parameters) for every statement ``engine`` executes in the block."""
+    statements: List[Tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def analyze_statements(dbapi_connection: Any, statements: List[Tuple[str, Any]],
+                       allowed_scans: Sequence[str] = (),
+                       tables: Optional[Collection[str]] = None) -> List[Dict[str, Any]]:
+    """Plan each distinct statement; ``flagged`` lists full scans not in ``allowed_scans``.
+
+    With ``tables`` given, scans of anything else (materialized subqueries, CTEs) are not flagged.
+    """
+    report = []
+    seen = set()
+    for statement, parameters in statements:
+        if statement in seen:
+            continue
+        seen.add(statement)
+        plan = explain_query_plan(dbapi_connection, statement, parameters)
+        scans = full_scans(plan)
+        report.append({
+            'sql': statement,
+            'plan': plan,
+            'full_scans': scans,
+            'flagged': [table for table in scans
+                        if table not in allowed_scans and (tables is None or table in tables)],
+        })
+    return report
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Regenerate the teacher dashboard rollups (student_summary, teacher_summary) from raw data.
+
+The rollups are maintained as sessions and engagement change; run this after bulk
+imports, manual SQL edits or restores, or with --check to see whether they drifted.
+
+    python rebuild_summaries.py          # rebuild both tables
+    python rebuild_summaries.py --check  # report students whose rollup differs, change nothing
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--check', action='store_true', help='compare stored rollups with raw data; exit 1 on drift')
+    args = parser.parse_args()
+
+    import app as app_module
+
+    with app_module.app.app_context():
+        if args.check:
+            stored = {row.student_id: row for row in app_module.StudentSummary.query.all()}
+            expected = app_module._student_summary_values(app_module.db.session.connection())
+            drifted = [
+                student_id for student_id, values in expected.items()
+                if student_id not in stored or any(
+                    abs(getattr(stored[student_id], field) - values[field]) > 1e-6
+                    for field in app_module.SUMMARY_FIELDS
+                )
+            ]
+            print(f"{len(drifted)} of {len(expected)} student rollups differ from raw data")
+            for student_id in drifted[:20]:
+                print(f"    student {student_id}")
+            sys.exit(1 if drifted else 0)
+
+        students, teachers = app_module.rebuild_dashboard_summaries()
+        print(f"✓ Rebuilt dashboard summaries for {students} students and {teachers} teachers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import zlib
+from typing import Any, Dict, List, Optional
+
+# Recommendation tiers, selectable per deployment and per route:
+#   local      template text only, no network call
+#   llm        call the LLM and fall back to the template text on error
+#   llm_async  answer with the template text (or a cached LLM reply) now; the LLM
+#              version is generated in the background and replaces it when ready
+RECOMMENDATION_MODES = ('local', 'llm', 'llm_async')
+
+PERFORMANCE_LEVELS = [
+    (90, 'excellent'),
+    (80, 'very good'),
+    (70, 'good'),
+    (60, 'satisfactory'),
+    (50, 'needs improvement'),
+]
+
+_STUDENT_OPENERS = {
+    'high': [
+        "Excellent work! You've mastered this material. Consider exploring more advanced topics or helping classmates.",
+        "Outstanding performance! You're ready to tackle more challenging concepts. Share your knowledge with others!",
+        "Brilliant achievement! You've demonstrated deep understanding. Time to explore advanced applications!",
+    ],
+    'mid': [
+        "Great effort! Keep up the good work and continue learning.",
+        "Well done! Your progress shows dedication. Focus on strengthening your understanding.",
+        "Good work! You're building solid foundations. Keep practicing to enhance your skills.",
+    ],
+    'low': [
+        "Keep working hard! Focus on reviewing the fundamental concepts and consider asking your teacher for additional help.",
+        "Don't give up! Every challenge is an opportunity to grow. Review the basics and seek support when needed.",
+        "Stay motivated! Learning takes time and practice. Focus on understanding the core concepts first.",
+    ],
+}
+
+_TEACHER_OPENERS = {
+    'high': [
+        "Assign {name} to advanced topics and consider having them mentor struggling classmates. Provide enrichment materials and challenge them with complex problem-solving tasks.",
+        "Encourage {name} to explore advanced applications of this topic. Assign leadership roles in group activities and provide opportunities for independent research projects.",
+        "Challenge {name} with higher-level materials and consider cross-curricular connections. Assign them as a peer tutor and provide advanced assessment opportunities.",
+    ],
+    'mid': [
+        "Provide {name} with additional practice materials and targeted review sessions. Monitor their progress closely and offer one-on-one support when needed.",
+        "Assign {name} supplementary exercises focusing on weak areas. Schedule regular check-ins and provide positive reinforcement for improvements.",
+        "Create a personalized study plan for {name} with specific goals and milestones. Offer extra help sessions and encourage peer study groups.",
+    ],
+    'low': [
+        "Schedule one-on-one tutoring sessions with {name} to address fundamental gaps. Provide prerequisite materials and break down complex concepts into smaller steps.",
+        "Create a structured intervention plan for {name} with daily check-ins. Assign simpler practice materials and consider peer mentoring from higher-performing students.",
+        "Develop a comprehensive support plan for {name} including remedial resources, extra practice time, and regular progress assessments. Consider involving parents in the support process.",
+    ],
+}
+
+_STUDENT_RESOURCE_TIPS = {
+    'video': "Rewatch the parts of the video behind the questions you missed, pausing to take notes.",
+    'note': "Re-read the sections behind the questions you missed and summarize each one in your own words.",
+    'link': "Revisit the linked material and focus on the parts tied to the questions you missed.",
+}
+
+_TEACHER_RESOURCE_TIPS = {
+    'video': "Give them a guided note sheet or transcript to use alongside the video.",
+    'note': "Pair the notes with a worked example or a visual summary of the key ideas.",
+    'link': "Point them to the specific sections of the linked material that match the missed questions.",
+}
+
+
+def performance_level(score: Optional[float]) -> str:
+    for threshold, label in PERFORMANCE_LEVELS:
+        if score and score >= threshold:
+            return label
+    return 'requires significant improvement'
+
+
+def _band(score: Optional[float]) -> str:
+    if score and score >= 80:
+        return 'high'
+    if score and score >= 60:
+        return 'mid'
+    return 'low'
+
+
+def _pick(options: List[str], seed: str) -> str:
+    # crc32 rather than hash(): the choice must be stable across processes
+    return options[zlib.crc32(seed.encode('utf-8')) % len(options)]
+
+
+def _engagement_ratios(engagement: Optional[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+    if not engagement:
+        return None
+    total = float(engagement.get('total_time_spent') or 0)
+    if total <= 0:
+        return None
+    return {
+        'focus': min(float(engagement.get('focus_time') or 0) / total, 1.0),
+        'idle': min(float(engagement.get('idle_time') or 0) / total, 1.0),
+        'scroll': float(engagement.get('scroll_depth') or 0),
+    }
+
+
+def student_recommendation(quiz_score: Optional[float], duration_seconds: Optional[float] = 0,
+                           student_name: str = 'Student', resource_title: str = 'this topic',
+                           resource_type: Optional[str] = None, engagement: Optional[Dict[str, Any]] = None,
+                           seed: str = '') -> str:
+    """Personalized recommendation for a student from score band, study time, engagement and resource type."""
+    band = _band(quiz_score)
+    minutes = int((duration_seconds or 0) // 60)
+    parts = [_pick(_STUDENT_OPENERS[band], seed)]
+
+    if band == 'low' and minutes < 5:
+        parts.append(f"You spent about {minutes} minutes on {resource_title}; a slower, focused pass through it before the next attempt should help.")
+    elif band == 'low' and minutes >= 30:
+        parts.append(f"You put {minutes} minutes into {resource_title}, so the effort is there. Try shorter review sessions and test yourself as you go.")
+    elif band == 'high' and 0 < minutes < 10:
+        parts.append(f"Finishing {resource_title} in {minutes} minutes shows a strong grasp of it.")
+
+    ratios = _engagement_ratios(engagement)
+    if ratios and band != 'high':
+        if ratios['focus'] < 0.5 or ratios['idle'] > 0.4:
+            parts.append("Find a quiet spot and put other tabs away next time; much of this session was spent away from the material.")
+        elif ratios['scroll'] < 60 and resource_type in ('note', 'link'):
+            parts.append("Make sure you work through the whole resource; some of it was never reached.")
+
+    if band != 'high' and resource_type in _STUDENT_RESOURCE_TIPS:
+        parts.append(_STUDENT_RESOURCE_TIPS[resource_type])
+    return ' '.join(parts)
+
+
+def teacher_strategy(quiz_score: Optional[float], duration_seconds: Optional[float] = 0,
+                     student_name: str = 'Student', resource_title: str = 'this topic',
+                     resource_type: Optional[str] = None, engagement: Optional[Dict[str, Any]] = None,
+                     seed: str = '') -> str:
+    """Teacher-facing action plan built from the same signals as student_recommendation."""
+    band = _band(quiz_score)
+    minutes = int((duration_seconds or 0) // 60)
+    parts = [_pick(_TEACHER_OPENERS[band], seed).format(name=student_name)]
+
+    if band != 'high' and minutes < 5:
+        parts.append(f"{student_name} spent only {minutes} minutes on {resource_title}; set a minimum study time before the quiz is attempted.")
+    elif band == 'low' and minutes >= 30:
+        parts.append(f"{student_name} studied {resource_title} for {minutes} minutes and still struggled, which points to a conceptual gap rather than effort; check understanding one-on-one.")
+
+    ratios = _engagement_ratios(engagement)
+    if ratios and band != 'high' and (ratios['focus'] < 0.5 or ratios['idle'] > 0.4):
+        parts.append("Engagement data shows frequent loss of focus, so break the work into shorter tasks with check-ins.")
+
+    if band != 'high' and resource_type in _TEACHER_RESOURCE_TIPS:
+        parts.append(_TEACHER_RESOURCE_TIPS[resource_type])
+    return ' '.join(parts)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Compact student_activity into the hourly and daily rollups (activity_rollup_hourly/daily).
+
+The app runs this incrementally in the background while activity arrives; run it by hand
+after bulk imports or restores, or with --rebuild after editing student_activity directly.
+
+    python rollup_activity.py            # roll up every finished hour not yet compacted
+    python rollup_activity.py --rebuild  # drop the rollups and regenerate them from raw rows
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rebuild', action='store_true', help='regenerate the rollups from every student_activity row')
+    args = parser.parse_args()
+
+    import app as app_module
+
+    with app_module.app.app_context():
+        if args.rebuild:
+            rolled = app_module.rebuild_activity_rollups()
+        else:
+            rolled = app_module.compact_activity_rollups()
+        state = app_module.db.session.get(app_module.ActivityRollupState, 1)
+        until = state.rolled_until.strftime('%Y-%m-%d %H:%M') if state and state.rolled_until else 'never'
+        print(f"✓ Rolled up {rolled} activity events; rollups cover activity before {until}")
+
+
+if __name__ == "__main__":
+    main()
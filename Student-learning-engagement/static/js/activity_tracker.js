@@ -1,8 +1,19 @@
 // Student Activity Tracking System
 class ActivityTracker {
-    constructor(resourceId, sessionId) {
+    constructor(resourceId, sessionId, options = {}) {
         this.resourceId = resourceId;
         this.sessionId = sessionId;
+        
+        // Delivery mode: 'batch' buffers events and flushes them together,
+        // 'immediate' posts every event to /api/track_activity on its own
+        this.mode = options.mode || 'batch';
+        this.flushInterval = (options.flushInterval || 10) * 1000;
+        this.maxBufferSize = options.maxBufferSize || 200;
+        // Uploads are split to stay under the server's per-batch cap (ACTIVITY_BATCH_MAX_EVENTS)
+        // and the ~64 KB browsers allow for a beacon or keepalive request
+        this.maxBatchEvents = options.maxBatchEvents || 500;
+        this.maxBatchBytes = options.maxBatchBytes || 60000;
+        this.eventBuffer = [];
         this.startTime = Date.now();
         this.lastActivity = Date.now();
         this.isActive = true;
@@ -28,6 +39,7 @@ class ActivityTracker {
         
         this.initializeTracking();
         this.startPeriodicUpdates();
+        this.startBatchFlushing();
         this.initializeReadingSpeedTracking();
     }
     
@@ -334,6 +346,18 @@ class ActivityTracker {
     }
     
     trackActivity(activityType, data) {
+        if (this.mode === 'batch') {
+            this.eventBuffer.push({
+                activity_type: activityType,
+                data: data,
+                client_ts: new Date().toISOString()
+            });
+            if (this.eventBuffer.length >= this.maxBufferSize) {
+                this.flushEvents();
+            }
+            return;
+        }
+        
         const payload = {
             resource_id: this.resourceId,
             session_id: this.sessionId,
@@ -354,6 +378,86 @@ class ActivityTracker {
         });
     }
     
+    startBatchFlushing() {
+        if (this.mode !== 'batch') return;
+        
+        this.flushTimer = setInterval(() => this.flushEvents(), this.flushInterval);
+        
+        // Deliver whatever is buffered when the tab is hidden (may never come back)
+        document.addEventListener('visibilitychange', () => {
+            if (document.hidden) {
+                this.flushEvents(true);
+            }
+        });
+    }
+    
+    flushEvents(useBeacon = false) {
+        if (this.eventBuffer.length === 0) return;
+        
+        const events = this.eventBuffer.splice(0, this.eventBuffer.length);
+        this.chunkEvents(events).forEach(chunk => this.sendBatch(chunk, useBeacon));
+    }
+    
+    chunkEvents(events) {
+        // Split into batches of at most maxBatchEvents events and roughly maxBatchBytes
+        const chunks = [];
+        let chunk = [];
+        let bytes = 0;
+        events.forEach(event => {
+            const size = JSON.stringify(event).length + 1;
+            if (chunk.length > 0 && (chunk.length >= this.maxBatchEvents || bytes + size > this.maxBatchBytes)) {
+                chunks.push(chunk);
+                chunk = [];
+                bytes = 0;
+            }
+            chunk.push(event);
+            bytes += size;
+        });
+        if (chunk.length > 0) {
+            chunks.push(chunk);
+        }
+        return chunks;
+    }
+    
+    sendBatch(events, useBeacon = false) {
+        const payload = JSON.stringify({
+            resource_id: this.resourceId,
+            session_id: this.sessionId,
+            events: events
+        });
+        
+        if (useBeacon && navigator.sendBeacon) {
+            // sendBeacon cannot set headers, so the CSRF token travels as a form field
+            const form = new FormData();
+            form.append('csrf_token', this.getCSRFToken());
+            form.append('payload', payload);
+            if (navigator.sendBeacon('/api/track_activity/batch', form)) {
+                return;
+            }
+        }
+        
+        const retryLater = (reason) => {
+            console.warn('Activity batch upload failed:', reason);
+            // Put events back so the next flush retries them
+            this.eventBuffer = events.concat(this.eventBuffer).slice(-this.maxBufferSize * 5);
+        };
+        
+        fetch('/api/track_activity/batch', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': this.getCSRFToken()
+            },
+            body: payload,
+            keepalive: true
+        }).then(response => {
+            // fetch resolves on HTTP errors too; a rejected batch must not be dropped
+            if (!response.ok) {
+                retryLater(`HTTP ${response.status}`);
+            }
+        }).catch(retryLater);
+    }
+    
     trackSessionEnd() {
         const totalTime = Math.round((Date.now() - this.startTime) / 1000);
         
@@ -387,6 +491,13 @@ class ActivityTracker {
             timestamp: new Date().toISOString()
         };
         
+        if (this.mode === 'batch') {
+            // Final totals ride along with the remaining buffered events
+            this.trackActivity('session_end', finalData);
+            this.flushEvents(true);
+            return;
+        }
+        
         // Use sendBeacon for reliable delivery on page unload
         const payload = JSON.stringify({
             resource_id: this.resourceId,
@@ -454,6 +565,9 @@ class ActivityTracker {
         if (this.idleTimer) {
             clearInterval(this.idleTimer);
         }
+        if (this.flushTimer) {
+            clearInterval(this.flushTimer);
+        }
         this.trackSessionEnd();
     }
 }
@@ -467,7 +581,11 @@ document.addEventListener('DOMContentLoaded', function() {
     const sessionId = window.SESSION_ID;
     
     if (resourceId) {
-        window.activityTracker = new ActivityTracker(resourceId, sessionId);
+        window.activityTracker = new ActivityTracker(resourceId, sessionId, {
+            mode: window.ACTIVITY_TRACKER_MODE,
+            flushInterval: window.ACTIVITY_FLUSH_INTERVAL,
+            maxBatchEvents: window.ACTIVITY_BATCH_MAX_EVENTS
+        });
         
         // Ensure cleanup on page unload
         window.addEventListener('beforeunload', () => {
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test batched activity ingestion (/api/track_activity/batch) and client timestamp parsing
+(runs against the test database configured in conftest.py)
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import csrf_token, logged_in_client, make_resource, make_students, make_user
+from app import app, db, StudentActivity, StudySession, _parse_client_timestamp
+
+
+def test_parse_client_timestamp():
+    """ISO strings (with or without a zone) and epoch millis parse; junk is None; the future is clamped"""
+    assert _parse_client_timestamp('2025-03-01T10:15:00') == datetime(2025, 3, 1, 10, 15)
+    utc = datetime(2025, 3, 1, 10, 15, tzinfo=timezone.utc)
+    assert _parse_client_timestamp('2025-03-01T10:15:00Z') == utc.astimezone().replace(tzinfo=None)
+    assert _parse_client_timestamp(utc.timestamp() * 1000) == utc.astimezone().replace(tzinfo=None)
+    for bad in (None, '', 'yesterday', {'ts': 1}, float('nan')):
+        assert _parse_client_timestamp(bad) is None, bad
+    future = _parse_client_timestamp((datetime.now() + timedelta(days=1)).isoformat())
+    assert future <= datetime.now()
+    print("✓ Client timestamps")
+
+
+def _setup():
+    """Two students of one teacher, each with an open session on the same note"""
+    with app.app_context():
+        db.create_all()
+        teacher = make_user('teacher')
+        note = make_resource(teacher, 'note')
+        student, other = make_students(teacher, 2, with_login=True)
+        sessions = [StudySession(student_id=s.id, resource_id=note.id, start_time=datetime.now()) for s in (student, other)]
+        db.session.add_all(sessions)
+        db.session.commit()
+        return student.user_id, student.id, note.id, sessions[0].id, sessions[1].id
+
+
+def _stored(student_id):
+    with app.app_context():
+        return [(a.activity_type, a.session_id, a.timestamp)
+                for a in StudentActivity.query.filter_by(student_id=student_id).order_by(StudentActivity.id)]
+
+
+def test_json_and_beacon_batches():
+    """JSON and sendBeacon form batches are stored in client-timestamp order; bad timestamps fall back to now"""
+    user_id, student_id, note_id, session_id, _ = _setup()
+    client = logged_in_client(user_id)
+    token = csrf_token(client)
+    start = datetime(2025, 3, 1, 10, 0)
+    events = [
+        {'activity_type': 'scroll', 'data': {'scroll_percentage': 30}, 'client_ts': (start + timedelta(seconds=20)).isoformat()},
+        {'activity_type': 'click', 'client_ts': (start + timedelta(seconds=5)).isoformat()},
+        {'activity_type': 'focus_time', 'data': {'duration': 4}, 'client_ts': 'not a time'},
+        {'activity_type': 'cursor_movement'},
+        {'activity_type': '  ', 'client_ts': start.isoformat()},  # rejected
+        'not an event',  # rejected
+    ]
+    before = datetime.now()
+    response = client.post('/api/track_activity/batch', headers={'X-CSRFToken': token},
+                           json={'resource_id': note_id, 'session_id': session_id, 'events': events})
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'accepted': 4, 'rejected': 2}
+    stored = _stored(student_id)
+    assert [t for t, _, _ in stored] == ['click', 'scroll', 'focus_time', 'cursor_movement']
+    assert [ts for _, _, ts in stored[:2]] == [start + timedelta(seconds=5), start + timedelta(seconds=20)]
+    assert all(ts >= before for _, _, ts in stored[2:])  # malformed or missing client_ts
+    assert {sid for _, sid, _ in stored} == {session_id}
+
+    response = client.post('/api/track_activity/batch', data={
+        'csrf_token': token,
+        'payload': json.dumps({'resource_id': note_id, 'session_id': session_id,
+                               'events': [{'activity_type': 'session_end', 'data': {'total_time': 60}}]}),
+    })
+    assert response.get_json() == {'success': True, 'accepted': 1, 'rejected': 0}
+    assert _stored(student_id)[-1][:2] == ('session_end', session_id)
+    print("✓ JSON and beacon batches")
+
+
+def test_oversized_batches_and_foreign_sessions_are_rejected():
+    """Batches over ACTIVITY_BATCH_MAX_EVENTS get 413; another student's session id is not used"""
+    user_id, student_id, note_id, session_id, other_session_id = _setup()
+    client = logged_in_client(user_id)
+    headers = {'X-CSRFToken': csrf_token(client)}
+    limit = app.config['ACTIVITY_BATCH_MAX_EVENTS']
+    response = client.post('/api/track_activity/batch', headers=headers, json={
+        'resource_id': note_id, 'events': [{'activity_type': 'click'}] * (limit + 1)})
+    assert response.status_code == 413 and _stored(student_id) == []
+
+    response = client.post('/api/track_activity/batch', headers=headers, json={
+        'resource_id': note_id, 'session_id': other_session_id, 'events': [{'activity_type': 'click'}]})
+    assert response.get_json()['accepted'] == 1
+    assert [sid for _, sid, _ in _stored(student_id)] == [session_id]  # the student's own open session
+    with app.app_context():
+        assert StudentActivity.query.filter_by(session_id=other_session_id).count() == 0
+    print("✓ Oversized batches and foreign sessions rejected")
+
+
+if __name__ == "__main__":
+    test_parse_client_timestamp()
+    test_json_and_beacon_batches()
+    test_oversized_batches_and_foreign_sessions_are_rejected()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test the append-only activity log and its loader
+(the app loader test runs against the test database configured in conftest.py)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import make_resource, make_students, make_user
+from activity_log import ActivityLog
+
+
+def test_append_seal_and_load():
+    """Appended records reach the loader in one call per segment and the segment is removed"""
+    loaded = []
+    with tempfile.TemporaryDirectory() as tmp:
+        log = ActivityLog(tmp, loaded.append, load_interval=3600)
+        for i in range(5):
+            log.append({'student_id': 1, 'resource_id': 2, 'activity_type': 'click',
+                        'timestamp': datetime(2025, 1, 1, 10, 0, i), 'data': {'n': i}})
+        assert log.load_ready_segments() == 0  # active segment is not loaded until sealed
+        log.seal()
+        assert log.load_ready_segments() == 5
+        assert len(loaded) == 1 and [r['data']['n'] for r in loaded[0]] == [0, 1, 2, 3, 4]
+        assert loaded[0][0]['timestamp'] == '2025-01-01T10:00:00'
+        assert os.listdir(tmp) == []
+    print("✓ Sealed segments are bulk-loaded and removed")
+
+
+def test_recovery_replays_unloaded_segments():
+    """Segments from a crashed process (open or mid-load) are replayed by the next one"""
+    loaded = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # A dead writer's open segment, with a torn last line
+        with open(os.path.join(tmp, 'activity-999999999-x.open'), 'w') as f:
+            f.write('{"activity_type": "click"}\n{"activity_type": "scr')
+        # A segment a dead loader had claimed
+        with open(os.path.join(tmp, 'activity-999999999-y.loading-999999999'), 'w') as f:
+            f.write('{"activity_type": "scroll"}\n')
+
+        log = ActivityLog(tmp, loaded.append, load_interval=3600)
+        log.recover()
+        assert log.load_ready_segments() == 2
+        assert sorted(r['activity_type'] for batch in loaded for r in batch) == ['click', 'scroll']
+    print("✓ Crash recovery replays unloaded segments")
+
+
+def test_failed_load_keeps_segment():
+    """A loader error leaves the segment in place for the next pass"""
+    with tempfile.TemporaryDirectory() as tmp:
+        def failing(records):
+            raise RuntimeError('database is locked')
+
+        log = ActivityLog(tmp, failing, load_interval=3600)
+        log.append({'activity_type': 'click'})
+        log.seal()
+        try:
+            log.load_ready_segments()
+        except RuntimeError:
+            pass
+        log.loader_fn = lambda records: None
+        assert log.load_ready_segments() == 1
+    print("✓ Failed loads are retried")
+
+
+def test_segment_that_keeps_failing_is_quarantined():
+    """A segment that can never be loaded is set aside after max_attempts; later segments still load"""
+    calls = []
+    loaded = []
+    with tempfile.TemporaryDirectory() as tmp:
+        def loader(records):
+            calls.append(records)
+            if any(r['activity_type'] == 'bad' for r in records):
+                raise RuntimeError('FOREIGN KEY constraint failed')
+            loaded.extend(records)
+
+        log = ActivityLog(tmp, loader, load_interval=3600, max_attempts=3)
+        log.append({'activity_type': 'bad'})
+        log.seal()
+        log.append({'activity_type': 'click'})
+        log.seal()
+        for _ in range(3):
+            try:
+                log.load_ready_segments()
+                assert False, 'expected the bad segment to fail'
+            except RuntimeError:
+                pass
+        assert [r['activity_type'] for r in loaded] == ['click']  # not blocked by the bad segment
+        assert len(calls) == 4
+        assert log.load_ready_segments() == 0 and len(calls) == 4  # no longer retried
+        assert [name.rsplit('.', 1)[-1] for name in os.listdir(tmp)] == ['failed']
+    print("✓ Persistently failing segments are quarantined")
+
+
+def test_app_loader_skips_rows_the_database_rejects():
+    """A record for a missing student is dropped; the rest of its segment is still inserted"""
+    from app import app, db, StudentActivity, _load_logged_activities
+
+    with app.app_context():
+        db.create_all()
+        teacher = make_user('teacher')
+        note = make_resource(teacher, 'note')
+        student, = make_students(teacher)
+        db.session.commit()
+        student_id, note_id = student.id, note.id
+
+    stamp = datetime(2025, 1, 1, 10, 0).isoformat()
+    _load_logged_activities([
+        {'student_id': student_id, 'resource_id': note_id, 'activity_type': 'click', 'timestamp': stamp},
+        {'student_id': 987654321, 'resource_id': note_id, 'activity_type': 'click', 'timestamp': stamp},
+        {'student_id': student_id, 'resource_id': note_id, 'activity_type': 'scroll', 'timestamp': stamp},
+    ])
+    with app.app_context():
+        stored = [a.activity_type for a in StudentActivity.query.filter_by(resource_id=note_id).order_by(StudentActivity.id)]
+        assert stored == ['click', 'scroll']
+        assert StudentActivity.query.filter_by(student_id=987654321).count() == 0
+    print("✓ Rows rejected by the database are skipped")
+
+
+if __name__ == "__main__":
+    test_append_seal_and_load()
+    test_recovery_replays_unloaded_segments()
+    test_failed_load_keeps_segment()
+    test_segment_that_keeps_failing_is_quarantined()
+    test_app_loader_skips_rows_the_database_rejects()
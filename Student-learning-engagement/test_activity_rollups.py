@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test the hourly/daily activity rollups and the reports that read them
+(the app test runs against the test database configured in conftest.py)
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import logged_in_client, make_resource, make_students, make_user
+import activity_rollup
+
+
+def test_buckets_and_most_active_time():
+    """Events fold into per-period buckets the way the engagement rollup reads them"""
+    noon = datetime(2024, 3, 4, 12, 30)
+    rows = [
+        (1, 2, 'time_spent', noon, {'duration': 30}),
+        (1, 2, 'scroll', noon.replace(minute=45), {'scroll_percentage': 40.0}),
+        (1, 2, 'scroll', noon.replace(hour=14), {'max_scroll_depth': 75.0}),
+        (1, 2, 'focus_time', noon, {'duration': 'bad'}),  # counted, adds no time
+        (1, 3, 'idle_time', noon, {'duration': 5}),
+    ]
+    hourly = activity_rollup.rollup_events(rows, 'hour')
+    assert hourly[(1, 2, datetime(2024, 3, 4, 12))] == {
+        'event_count': 3, 'activity_counts': {'time_spent': 1, 'scroll': 1, 'focus_time': 1},
+        'time_spent': 30, 'focus_time': 0, 'idle_time': 0, 'max_scroll': 40.0,
+    }
+    daily = activity_rollup.rollup_events(rows, 'day')
+    day = daily[(1, 2, datetime(2024, 3, 4))]
+    assert day['event_count'] == 4 and day['max_scroll'] == 75.0
+    merged = activity_rollup.merge_bucket(dict(day), hourly[(1, 2, datetime(2024, 3, 4, 12))])
+    assert merged['activity_counts']['scroll'] == 3 and merged['time_spent'] == 60
+
+    assert activity_rollup.most_active_time({}) == 'N/A'
+    assert activity_rollup.most_active_time({9: 4, 14: 6}) == 'Afternoon (2-3 PM)'
+    assert activity_rollup.most_active_time({11: 2}) == 'Morning (11 AM-12 PM)'
+    assert activity_rollup.most_active_time({23: 1}) == 'Night (11 PM-12 AM)'
+    print("✓ Activity buckets and most active time")
+
+
+def _raw_history(StudentActivity, student_id):
+    counts = {}
+    for activity in StudentActivity.query.filter_by(student_id=student_id):
+        counts[activity.activity_type] = counts.get(activity.activity_type, 0) + 1
+    return counts
+
+
+def test_incremental_rollups_match_raw_data():
+    """Compaction is incremental: window rows and late rows are rolled up once, matching raw data and a rebuild"""
+    from app import (app, db, StudentActivity, ActivityRollupDaily, ActivityRollupHourly,
+                     activity_history, compact_activity_rollups, rebuild_activity_rollups)
+
+    now = datetime.now()
+    with app.app_context():
+        db.create_all()
+        teacher = make_user('teacher')
+        note = make_resource(teacher, 'note')
+        student, = make_students(teacher)
+
+        def add(activity_type, timestamp, data=None):
+            db.session.add(StudentActivity(student_id=student.id, resource_id=note.id, activity_type=activity_type,
+                                           timestamp=timestamp, data=data or {}))
+
+        for days in (3, 3, 1):
+            add('time_spent', now - timedelta(days=days), {'duration': 60})
+        add('scroll', now - timedelta(days=1, hours=2), {'scroll_percentage': 55.0})
+        add('click', now)  # current hour: stays raw
+        db.session.commit()
+        teacher_id, student_id = teacher.id, student.id
+
+        compact_activity_rollups(now)
+        assert compact_activity_rollups(now) == 0  # nothing new for this boundary
+        daily = ActivityRollupDaily.query.filter_by(student_id=student_id).all()
+        assert sum(row.event_count for row in daily) == 4
+        assert sum(row.time_spent for row in daily) == 180
+        assert activity_history(student_id)['activity_counts'] == _raw_history(StudentActivity, student_id)
+
+        add('click', now - timedelta(days=2))  # arrives late, behind the rolled-up boundary
+        db.session.commit()
+        assert activity_history(student_id)['activity_counts'] == {'time_spent': 3, 'scroll': 1, 'click': 1}
+
+        compact_activity_rollups(now + timedelta(hours=2))  # picks up the late row and the old window
+        history = activity_history(student_id)
+        assert history['activity_counts'] == _raw_history(StudentActivity, student_id) == {'time_spent': 3, 'scroll': 1, 'click': 2}
+        hourly_events = sum(row.event_count for row in ActivityRollupHourly.query.filter_by(student_id=student_id))
+        assert hourly_events == 6
+
+        stored = sorted((r.period_start, r.event_count, r.activity_counts, r.time_spent, r.max_scroll)
+                        for r in ActivityRollupDaily.query.filter_by(student_id=student_id))
+        rebuild_activity_rollups(now + timedelta(hours=2))
+        assert stored == sorted((r.period_start, r.event_count, r.activity_counts, r.time_spent, r.max_scroll)
+                                for r in ActivityRollupDaily.query.filter_by(student_id=student_id))
+        assert activity_history(student_id) == history
+
+    client = logged_in_client(teacher_id)
+    assert client.get(f'/teacher/student_detailed_report/{student_id}').status_code == 200
+    printable = client.get(f'/teacher/student_printable_report/{student_id}').get_data(as_text=True)
+    assert activity_rollup.most_active_time(history['events_by_hour']) in printable
+    data = client.get(f'/api/teacher/student_comprehensive_data/{student_id}').get_json()
+    assert data['statistics']['activity_types_summary'] == history['activity_counts']
+    assert data['activities_summary'] == 6 and len(data['sample_recent_activities']) == 6
+    print("✓ Incremental rollups match raw activity")
+
+
+if __name__ == "__main__":
+    test_buckets_and_most_active_time()
+    test_incremental_rollups_match_raw_data()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test the per-teacher analytics cache and its invalidation on committed activity
+(the app test runs against the test database configured in conftest.py)
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import logged_in_client, make_resource, make_students, make_user
+from analytics_cache import AnalyticsCache
+
+
+def test_generations_ttl_and_lru():
+    """Invalidation hides entries (also ones computed across it); TTL and capacity evict"""
+    cache = AnalyticsCache(ttl_seconds=0.2, max_entries=2)
+    calls = []
+    assert cache.get_or_compute(1, 'insights', lambda: calls.append(1) or {'n': 1}) == {'n': 1}
+    assert cache.get_or_compute(1, 'insights', lambda: calls.append(1) or {'n': 2}) == {'n': 1}
+    assert len(calls) == 1
+
+    generation = cache.generation(1)
+    cache.invalidate([1])
+    cache.set(1, 'insights', {'n': 'stale'}, generation=generation)  # computed before the invalidation
+    assert cache.get(1, 'insights') is None
+    cache.invalidate([1])
+    assert cache.get_or_compute(1, 'insights', lambda: {'n': 3}, store_if=lambda value: False) == {'n': 3}
+    assert cache.get(1, 'insights') is None
+
+    cache.set(1, 'analytics', 'a')
+    cache.set(2, 'analytics', 'b')
+    cache.set(2, 'analytics', 'c', params=('page', 2))
+    assert cache.get(1, 'analytics') is None  # least recently used
+    assert cache.get(2, 'analytics') == 'b'
+    time.sleep(0.25)
+    assert cache.get(2, 'analytics') is None
+    print("✓ Generations, TTL and LRU eviction")
+
+
+def test_shared_file_between_workers():
+    """Two instances on one file (two gunicorn workers) share values and invalidations"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache', 'analytics.db')
+        worker_a = AnalyticsCache(path=path)
+        worker_b = AnalyticsCache(path=path)
+        stamp = datetime(2024, 5, 1, 9, 30)
+        worker_a.set(7, 'analytics', {'recent': [{'timestamp': stamp, 'data': {'x': 1}}]})
+        assert worker_b.get(7, 'analytics') == {'recent': [{'timestamp': stamp, 'data': {'x': 1}}]}
+        assert worker_a.get(7, 'analytics') is not None and worker_b.get(7, 'analytics') is not None
+
+        worker_b.invalidate([7])
+        assert worker_a.get(7, 'analytics') is None  # worker A's local copy is stale too
+        assert worker_b.get(7, 'analytics') is None
+        worker_a.set(8, 'analytics', 'other teacher')
+        assert worker_b.get(8, 'analytics') == 'other teacher'
+    print("✓ Shared file carries values and invalidations across workers")
+
+
+def test_teacher_analytics_served_from_cache_until_activity_commits():
+    """Repeated polls hit the cache; a committed activity or engagement flush refreshes the result"""
+    from app import (app, db, analytics_cache, StudySession, ResourceEngagement, StudentActivity,
+                     _flush_engagement_deltas)
+    from query_plan import record_statements
+
+    assert analytics_cache is not None
+    with app.app_context():
+        db.create_all()
+        teacher = make_user('teacher')
+        note = make_resource(teacher, 'note')
+        student, = make_students(teacher)
+        session = StudySession(student_id=student.id, resource_id=note.id, start_time=datetime.now())
+        db.session.add(session)
+        db.session.flush()
+        db.session.add(ResourceEngagement(student_id=student.id, resource_id=note.id, session_id=session.id,
+                                          total_time_spent=120, focus_time=100))
+        db.session.commit()
+        ids = teacher.id, student.id, note.id, session.id
+    teacher_id, student_id, note_id, session_id = ids
+
+    client = logged_in_client(teacher_id)
+    first = client.get('/api/teacher/ml_analytics').get_json()
+    with app.app_context():
+        with record_statements(db.engine) as statements:
+            second = client.get('/api/teacher/ml_analytics').get_json()
+    assert second == first
+    assert not [sql for sql, _ in statements if 'resource_engagement' in sql.lower()], statements
+
+    page = client.get('/teacher/analytics').get_data(as_text=True)
+    assert 'Scrolled to' not in page
+    with app.app_context():
+        db.session.add(StudentActivity(student_id=student_id, resource_id=note_id, session_id=session_id,
+                                       activity_type='scroll', data={'scroll_percentage': 42.0}))
+        db.session.commit()
+    assert 'Scrolled to 42.0%' in client.get('/teacher/analytics').get_data(as_text=True)
+
+    _flush_engagement_deltas({(student_id, note_id, session_id): {
+        'total_time_spent': 60, 'cursor_movements': 0, 'clicks': 0, 'focus_time': 80, 'idle_time': 0, 'scroll_depth': 0.0,
+    }})
+    refreshed = client.get('/api/teacher/ml_analytics').get_json()
+    assert refreshed['avg_focus_percentage'] == 100.0 and first['avg_focus_percentage'] == round(100 / 120 * 100, 1)
+    print("✓ Teacher analytics are cached until activity for the teacher's students commits")
+
+
+def test_teacher_insights_follow_the_active_model_version():
+    """Saving, promoting or rolling back a model recomputes cached insights; repeat loads do not"""
+    import app as app_module
+    import ml_service
+    from app import app, db, StudySession
+
+    with app.app_context():
+        db.create_all()
+        teacher = make_user('teacher')
+        note = make_resource(teacher, 'note')
+        student, = make_students(teacher)
+        db.session.add(StudySession(student_id=student.id, resource_id=note.id, start_time=datetime.now(),
+                                    duration=300, completed=True, quiz_score=85.0))
+        db.session.commit()
+        teacher_id, student_id = teacher.id, student.id
+
+    client = logged_in_client(teacher_id)
+    deadline = time.monotonic() + 10
+    while client.get(f'/api/teacher/strategies?student_ids={student_id}').get_json()['pending']:
+        assert time.monotonic() < deadline, 'strategy job did not finish'  # pending results are not cached
+        time.sleep(0.05)
+
+    computed = []
+    original = app_module._teacher_insights_context
+    app_module._teacher_insights_context = lambda tid: computed.append(tid) or original(tid)
+    try:
+        ml_service.save_model(ml_service.SimpleLogisticModel(weights=[0.1, 0.2, 0.3], bias=0.0))
+        assert client.get('/teacher/insights').status_code == 200
+        assert client.get('/teacher/insights').status_code == 200
+        assert len(computed) == 1
+
+        ml_service.save_model(ml_service.SimpleLogisticModel(weights=[-0.1, 0.2, 0.3], bias=0.5))
+        rolled_back_to = ml_service.get_active_model_version()
+        newest = ml_service.save_model(ml_service.SimpleLogisticModel(weights=[0.3, 0.2, 0.1], bias=-0.5))
+        assert client.get('/teacher/insights').status_code == 200
+        assert len(computed) == 2
+
+        assert ml_service.rollback_model()['version'] == rolled_back_to
+        client.get('/teacher/insights')
+        assert len(computed) == 3
+        ml_service.promote_model_version(newest)
+        client.get('/teacher/insights')  # insights for this version are still cached
+        assert len(computed) == 3
+    finally:
+        app_module._teacher_insights_context = original
+    print("✓ Teacher insights are cached per active model version")
+
+
+if __name__ == "__main__":
+    test_generations_ttl_and_lru()
+    test_shared_file_between_workers()
+    test_teacher_analytics_served_from_cache_until_activity_commits()
+    test_teacher_insights_follow_the_active_model_version()
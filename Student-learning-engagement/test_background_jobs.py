@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test the background job helpers (no database required)
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from background_jobs import CoalescingWorker
+
+
+def test_bursts_coalesce_per_key():
+    """Many submissions for one key within the interval produce one run with the latest args"""
+    runs = []
+    worker = CoalescingWorker(lambda key, n: runs.append((key, n)), interval=3600, max_queue=10)
+    worker._ensure_thread = lambda: None  # drive it by hand
+    for n in range(50):
+        worker.submit(('student', 1), n)
+    worker.submit(('student', 2), 0)
+    assert worker.queue_depth() == 2
+    assert worker.run_pending() == 2
+    assert runs == [(('student', 1), 49), (('student', 2), 0)]
+    print("✓ Bursts for the same key collapse into one run")
+
+
+def test_interval_throttles_background_runs():
+    """A key that just ran waits for the interval before running again"""
+    done = threading.Event()
+    runs = []
+
+    def handler(key):
+        runs.append(time.monotonic())
+        if len(runs) == 2:
+            done.set()
+
+    worker = CoalescingWorker(handler, interval=0.3, max_queue=10)
+    worker.submit('session-1')
+    time.sleep(0.05)
+    worker.submit('session-1')
+    assert done.wait(2)
+    assert runs[1] - runs[0] >= 0.25
+    worker.shutdown()
+    print("✓ Runs per key are spaced by the coalescing interval")
+
+
+def test_queue_depth_is_bounded():
+    """New keys are rejected once max_queue keys are waiting"""
+    worker = CoalescingWorker(lambda key: None, interval=3600, max_queue=2)
+    worker._ensure_thread = lambda: None
+    assert worker.submit('a') and worker.submit('b')
+    assert not worker.submit('c')
+    assert worker.submit('a')  # already queued keys can still be refreshed
+    assert worker.dropped == 1
+    print("✓ Queue depth is bounded")
+
+
+if __name__ == "__main__":
+    test_bursts_coalesce_per_key()
+    test_interval_throttles_background_runs()
+    test_queue_depth_is_bounded()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test the incrementally maintained teacher dashboard rollups
+(runs against the test database configured in conftest.py)
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import logged_in_client, make_resource, make_students, make_user, new_tag
+from app import (app, db, StudySession, ResourceEngagement, StudentSummary, TeacherSummary,
+                 _flush_engagement_deltas, _student_summary_values, rebuild_dashboard_summaries)
+from query_plan import record_statements
+
+
+def _make_class(student_count):
+    grade = f'G{new_tag()}'  # a grade of its own, so other tests' students are not counted
+    teacher = make_user('teacher')
+    quiz = make_resource(teacher, 'quiz', grade=grade)
+    note = make_resource(teacher, 'note', grade=grade)
+    students = make_students(teacher, student_count, grade=grade)
+    db.session.commit()
+    return teacher, quiz, note, students
+
+
+def _add_results(students, quiz, note, score):
+    for student in students:
+        start = datetime.now() - timedelta(minutes=5)
+        db.session.add(StudySession(student_id=student.id, resource_id=quiz.id, start_time=start, quiz_score=score, completed=True))
+        reading = StudySession(student_id=student.id, resource_id=note.id, start_time=start, quiz_score=10.0)  # not a quiz
+        db.session.add(reading)
+        db.session.flush()
+        db.session.add(ResourceEngagement(student_id=student.id, resource_id=note.id, session_id=reading.id, total_time_spent=120))
+    db.session.commit()
+
+
+def _raw_teacher_totals(students):
+    values = _student_summary_values(db.session.connection(), [student.id for student in students]).values()
+    return (sum(v['quiz_score_sum'] for v in values), sum(v['quiz_score_count'] for v in values),
+            sum(v['engagement_time_sum'] for v in values), sum(v['engagement_count'] for v in values))
+
+
+def _stored_teacher_totals(teacher_id):
+    db.session.expire_all()
+    summary = db.session.get(TeacherSummary, teacher_id)
+    return (summary.quiz_score_sum, summary.quiz_score_count, summary.engagement_time_sum, summary.engagement_count)
+
+
+def test_rollups_follow_writes_and_rebuild():
+    """Inserts, score changes, bulk engagement flushes and deletions keep the rollup equal to raw data"""
+    with app.app_context():
+        db.create_all()
+        teacher, quiz, note, students = _make_class(3)
+        rebuild_dashboard_summaries()
+        assert _stored_teacher_totals(teacher.id) == (0, 0, 0, 0)
+
+        _add_results(students, quiz, note, 60.0)
+        assert _stored_teacher_totals(teacher.id) == (180.0, 3, 360, 3)
+
+        session = StudySession.query.filter_by(student_id=students[0].id, resource_id=quiz.id).first()
+        session.quiz_score = 90.0
+        db.session.commit()
+        engagement = ResourceEngagement.query.filter_by(student_id=students[1].id).first()
+        _flush_engagement_deltas({(students[1].id, note.id, engagement.session_id): {
+            'total_time_spent': 30, 'cursor_movements': 0, 'clicks': 0, 'focus_time': 0, 'idle_time': 0, 'scroll_depth': 0.0,
+        }})
+        assert _stored_teacher_totals(teacher.id) == (210.0, 3, 390, 3) == _raw_teacher_totals(students)
+        summary = db.session.get(TeacherSummary, teacher.id)
+        assert summary.student_count == 3 and summary.average_score == 70.0
+
+        # Removing a student (sessions first, as delete_student does) drops them from the rollup
+        gone = students.pop()
+        ResourceEngagement.query.filter_by(student_id=gone.id).delete(synchronize_session=False)
+        StudySession.query.filter_by(student_id=gone.id).delete(synchronize_session=False)
+        db.session.delete(gone)
+        db.session.commit()
+        assert db.session.get(StudentSummary, gone.id) is None
+        assert _stored_teacher_totals(teacher.id) == _raw_teacher_totals(students) == (150.0, 2, 270, 2)
+        assert db.session.get(TeacherSummary, teacher.id).student_count == 2
+
+        before = _stored_teacher_totals(teacher.id)
+        rebuild_dashboard_summaries()
+        assert _stored_teacher_totals(teacher.id) == before
+    print("✓ Rollups follow writes and match a rebuild")
+
+
+def test_bulk_refresh_looks_up_teachers_once():
+    """An engagement flush covering a whole class looks the grade's teachers up once, not per student"""
+    with app.app_context():
+        db.create_all()
+        teacher, quiz, note, students = _make_class(6)
+        _add_results(students, quiz, note, 50.0)
+        batch = {(e.student_id, note.id, e.session_id): {
+            'total_time_spent': 15, 'cursor_movements': 0, 'clicks': 0, 'focus_time': 0, 'idle_time': 0, 'scroll_depth': 0.0,
+        } for e in ResourceEngagement.query.filter(ResourceEngagement.student_id.in_([s.id for s in students]))}
+        with record_statements(db.engine) as statements:
+            _flush_engagement_deltas(batch)
+        lookups = [sql for sql, _ in statements if 'student.teacher_id is not null' in sql.lower()]
+        assert len(lookups) == 1, lookups
+        assert _stored_teacher_totals(teacher.id) == _raw_teacher_totals(students) == (300.0, 6, 6 * 135, 6)
+    print("✓ Bulk refresh looks teachers up once per batch")
+
+
+def test_teacher_dashboard_queries_do_not_grow_with_students():
+    """The dashboard issues the same number of queries for 2 students as for 12"""
+    counts = []
+    for student_count in (2, 12):
+        with app.app_context():
+            db.create_all()
+            teacher, quiz, note, students = _make_class(student_count)
+            _add_results(students, quiz, note, 75.0)
+            teacher_id = teacher.id
+        client = logged_in_client(teacher_id)
+        client.get('/teacher/dashboard')  # warm-up request
+        with app.app_context():
+            with record_statements(db.engine) as statements:
+                response = client.get('/teacher/dashboard')
+        assert response.status_code == 200
+        assert '75.0%' in response.get_data(as_text=True)
+        counts.append(len(statements))
+    assert counts[0] == counts[1], counts
+    print(f"✓ Teacher dashboard uses {counts[0]} queries for 2 and 12 students")
+
+
+if __name__ == "__main__":
+    test_rollups_follow_writes_and_rebuild()
+    test_bulk_refresh_looks_up_teachers_once()
+    test_teacher_dashboard_queries_do_not_grow_with_students()
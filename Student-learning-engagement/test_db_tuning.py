@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite performance profile and maintenance scheduler (no app database required)
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import db_tuning
+
+
+def test_profile_pragmas_and_overrides():
+    """busy_timeout and journal_mode come first; env overrides replace profile values"""
+    statements = db_tuning.sqlite_pragmas('wal', {'busy_timeout': 250, 'synchronous': None})
+    assert statements[:3] == ['PRAGMA busy_timeout=250', 'PRAGMA journal_mode=WAL', 'PRAGMA foreign_keys=ON']
+    assert 'PRAGMA synchronous=NORMAL' in statements
+    assert 'PRAGMA journal_mode=DELETE' in db_tuning.sqlite_pragmas('legacy')
+    try:
+        db_tuning.sqlite_pragmas('turbo')
+        assert False, 'expected an unknown profile to be rejected'
+    except ValueError:
+        pass
+    print("✓ Profile pragmas and overrides")
+
+
+def test_wal_profile_lets_readers_through_a_write():
+    """With WAL a reader is not blocked by an open write transaction; with the legacy journal it is"""
+    for profile, reader_blocked in (('wal', False), ('legacy', True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            pragmas = db_tuning.sqlite_pragmas(profile, {'busy_timeout': 0})
+            writer = sqlite3.connect(path, timeout=0, isolation_level=None)
+            db_tuning.apply_pragmas(writer, pragmas)
+            settings = db_tuning.current_pragmas(writer, ['journal_mode', 'foreign_keys', 'busy_timeout'])
+            assert settings == {'journal_mode': 'wal' if profile == 'wal' else 'delete', 'foreign_keys': 1, 'busy_timeout': 0}
+            writer.execute('CREATE TABLE t (x INTEGER)')
+            writer.execute('INSERT INTO t VALUES (1)')
+
+            reader = sqlite3.connect(path, timeout=0, isolation_level=None)
+            db_tuning.apply_pragmas(reader, pragmas)
+            writer.execute('BEGIN EXCLUSIVE')
+            writer.execute('INSERT INTO t VALUES (2)')
+            try:
+                assert reader.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 1
+                blocked = False
+            except sqlite3.OperationalError:
+                blocked = True
+            writer.execute('COMMIT')
+            assert blocked == reader_blocked, profile
+            reader.close()
+            writer.close()
+    print("✓ WAL readers are not blocked by writers")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_maintenance_runs_tasks_when_due():
+    """Checkpoints and ANALYZE run on their own intervals; 0 disables a task"""
+    clock = FakeClock()
+    executed = []
+    maintenance = db_tuning.SQLiteMaintenance(lambda statements: executed.append(statements) or (0, 3, 3),
+                                              checkpoint_interval=60, analyze_interval=600, clock=clock)
+    assert maintenance.run_due() == []
+    clock.now = 60
+    assert maintenance.run_due() == ['checkpoint']
+    assert executed[-1] == ['PRAGMA wal_checkpoint(PASSIVE)'] and maintenance.last_checkpoint_result == (0, 3, 3)
+    clock.now = 600
+    assert maintenance.run_due() == ['checkpoint', 'analyze']
+    assert executed[-1] == ['PRAGMA analysis_limit=1000', 'ANALYZE']
+
+    idle = db_tuning.SQLiteMaintenance(executed.append, checkpoint_interval=0, analyze_interval=0, clock=clock)
+    clock.now = 10 ** 6
+    assert idle.run_due() == []
+    idle.start()
+    assert idle._thread is None
+    try:
+        db_tuning.SQLiteMaintenance(executed.append, checkpoint_mode='SOMETIMES')
+        assert False, 'expected an unknown checkpoint mode to be rejected'
+    except ValueError:
+        pass
+    print("✓ Maintenance scheduling")
+
+
+if __name__ == "__main__":
+    test_profile_pragmas_and_overrides()
+    test_wal_profile_lets_readers_through_a_write()
+    test_maintenance_runs_tasks_when_due()
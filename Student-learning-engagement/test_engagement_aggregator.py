@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test the write-behind engagement aggregator
+(the app test runs against the test database configured in conftest.py)
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import csrf_token, logged_in_client, make_resource, make_students, make_user
+from engagement_aggregator import EngagementAggregator
+
+
+def test_deltas_accumulate_until_flush():
+    """Counters are summed and scroll depth kept as a max until flushed"""
+    flushed = []
+    agg = EngagementAggregator(flushed.append, flush_interval=3600, dirty_threshold=1000)
+    key = (1, 2, 3)
+
+    agg.record(key, 'click', {})
+    agg.record(key, 'click', {})
+    agg.record(key, 'cursor_move', {})
+    agg.record(key, 'time_spent', {'duration': 30})
+    agg.record(key, 'scroll', {'scroll_percentage': 40})
+    agg.record(key, 'scroll', {'max_scroll_depth': 25})
+    assert not agg.record(key, 'page_view', {})
+    assert flushed == []
+    assert agg.pending_count() == 6
+
+    assert agg.flush() == 1
+    delta = flushed[0][key]
+    assert delta['clicks'] == 2
+    assert delta['cursor_movements'] == 1
+    assert delta['total_time_spent'] == 30
+    assert delta['scroll_depth'] == 40
+    assert agg.pending_count() == 0
+    agg.shutdown()
+    print("✓ Deltas accumulate in memory and flush in one batch")
+
+
+def test_threshold_and_single_key_flush():
+    """Reaching the dirty threshold flushes; flush(key) only drains that rollup"""
+    flushed = []
+    agg = EngagementAggregator(flushed.append, flush_interval=3600, dirty_threshold=4)
+    agg.record((1, 1, None), 'click', {})
+    agg.record((2, 1, None), 'click', {})
+    assert agg.flush((2, 1, None)) == 1
+    assert list(flushed[0]) == [(2, 1, None)]
+    agg.record((1, 1, None), 'click', {})
+    agg.record((1, 1, None), 'click', {})
+    assert len(flushed) == 1
+    agg.record((1, 1, None), 'click', {})
+    assert len(flushed) == 2 and flushed[1][(1, 1, None)]['clicks'] == 4
+    agg.shutdown()
+    print("✓ Threshold and per-session flushes")
+
+
+def test_failed_flush_keeps_deltas():
+    """Deltas survive a failing flush and are merged with newer events"""
+    calls = []
+
+    def flaky(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise RuntimeError('database is locked')
+
+    agg = EngagementAggregator(flaky, flush_interval=3600, dirty_threshold=1000)
+    agg.record((1, 1, 1), 'click', {})
+    try:
+        agg.flush()
+    except RuntimeError:
+        pass
+    agg.record((1, 1, 1), 'click', {})
+    agg.flush()
+    assert calls[-1][(1, 1, 1)]['clicks'] == 2
+    agg.shutdown()
+    print("✓ Failed flushes are retried with merged deltas")
+
+
+def test_settle_replays_final_totals_after_the_delay():
+    """Final totals wait for settle_delay, survive a failing settle_fn and are forced out on shutdown"""
+    settled, failures = [], []
+
+    def settle(finals):
+        if failures:
+            raise RuntimeError(failures.pop())
+        settled.append(finals)
+
+    agg = EngagementAggregator(lambda batch: None, flush_interval=3600, settle_fn=settle, settle_delay=0.1)
+    agg.settle((1, 1, 1), {'total_clicks': 3})
+    assert agg.settle_due() == 0
+    time.sleep(0.15)
+    failures.append('database is locked')
+    try:
+        agg.settle_due()
+        assert False, 'expected RuntimeError'
+    except RuntimeError:
+        pass
+    assert agg.settle_due() == 1 and settled == [{(1, 1, 1): {'total_clicks': 3}}]
+
+    agg.settle((2, 1, 1), {'total_clicks': 5})
+    agg.shutdown()
+    assert settled[-1] == {(2, 1, 1): {'total_clicks': 5}}
+    print("✓ Session end totals are settled after the delay")
+
+
+def test_session_end_totals_win_over_another_workers_late_deltas():
+    """Deltas another worker buffered before session_end are not counted on top of the final totals"""
+    from app import app, db, engagement_aggregator, ResourceEngagement, StudySession, _flush_engagement_deltas
+
+    with app.app_context():
+        db.create_all()
+        teacher = make_user('teacher')
+        note = make_resource(teacher, 'note')
+        student, = make_students(teacher, with_login=True)
+        session = StudySession(student_id=student.id, resource_id=note.id, start_time=datetime.now())
+        db.session.add(session)
+        db.session.commit()
+        user_id, key = student.user_id, (student.id, note.id, session.id)
+
+    client = logged_in_client(user_id)
+    token = csrf_token(client)
+    events = [{'activity_type': 'click'}, {'activity_type': 'time_spent', 'data': {'duration': 20}}]
+    client.post('/api/track_activity/batch', headers={'X-CSRFToken': token},
+                json={'resource_id': key[1], 'session_id': key[2], 'events': events})
+
+    # A second gunicorn worker received the rest of the session's events and still buffers them
+    other_worker = EngagementAggregator(_flush_engagement_deltas, flush_interval=3600)
+    other_worker.record(key, 'click', {})
+    other_worker.record(key, 'time_spent', {'duration': 40})
+
+    final = {'total_time_spent': 60, 'total_clicks': 2, 'total_cursor_movements': 0,
+             'total_focus_time': 0, 'total_idle_time': 0, 'max_scroll_depth': 0.0}
+    client.post('/api/track_activity/batch', headers={'X-CSRFToken': token},
+                json={'resource_id': key[1], 'session_id': key[2],
+                      'events': [{'activity_type': 'session_end', 'data': final}]})
+    other_worker.shutdown()  # its window elapses after the session ended
+
+    def totals():
+        with app.app_context():
+            row = ResourceEngagement.query.filter_by(student_id=key[0], resource_id=key[1], session_id=key[2]).one()
+            return row.total_time_spent, row.clicks
+
+    assert totals() == (100, 3)  # counted twice until the totals settle
+    assert engagement_aggregator.settle_due(force=True) >= 1
+    assert totals() == (60, 2)
+    print("✓ Session end totals are settled after other workers flush")
+
+
+if __name__ == "__main__":
+    test_deltas_accumulate_until_flush()
+    test_threshold_and_single_key_flush()
+    test_failed_flush_keeps_deltas()
+    test_settle_replays_final_totals_after_the_delay()
+    test_session_end_totals_win_over_another_workers_late_deltas()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the SQL and NumPy engagement analytics paths against the row-by-row calculation
+(no app database required)
+"""
+
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import Column, Float, Integer, MetaData, Table, create_engine
+
+import engagement_analytics as ea
+
+metadata = MetaData()
+engagement = Table(
+    'resource_engagement', metadata,
+    Column('id', Integer, primary_key=True),
+    *[Column(name, Float if name in ('scroll_depth', 'reading_speed', 'engagement_score') else Integer)
+      for name in ea.COLUMNS]
+)
+
+
+def _reference_metrics(rows):
+    """The per-row passes get_ml_analytics() used to make over ORM objects"""
+    e = [SimpleNamespace(**dict(zip(ea.COLUMNS, row))) for row in rows]
+    n = len(e)
+    focus = sum(x.focus_time or 0 for x in e)
+    spent = sum(x.total_time_spent or 0 for x in e)
+    max_clicks = max(x.clicks or 0 for x in e)
+    max_cursor = max(x.cursor_movements or 0 for x in e)
+    speeds = [x.reading_speed or 0 for x in e if x.reading_speed]
+    over_time = []
+    for low, high in [(0, 5), (5, 10), (10, 15), (15, 20), (20, 25), (25, 30)]:
+        in_bin = [x for x in e if low <= (x.total_time_spent or 0) / 60 < high]
+        over_time.append(sum(x.engagement_score or 0 for x in in_bin) / len(in_bin) if in_bin else 0)
+    return {
+        'avg_focus_percentage': (focus / max(spent, 1)) * 100 if spent > 0 else 0,
+        'avg_scroll_percentage': sum(x.scroll_depth or 0 for x in e) / n,
+        'avg_click_percentage': (sum(x.clicks or 0 for x in e) / max(max_clicks * n, 1)) * 100,
+        'avg_cursor_percentage': (sum(x.cursor_movements or 0 for x in e) / max(max_cursor * n, 1)) * 100,
+        'avg_return_percentage': (sum(x.return_count or 0 for x in e) / max(sum(x.distraction_count or 0 for x in e), 1)) * 100,
+        'avg_reading_percentage': (sum(speeds) / max(len(speeds), 1)) / 200 * 100,
+        'focus_percentage': sum(1 for x in e if (x.focus_time or 0) > (x.total_time_spent or 1) * 0.7) / n * 100,
+        'distraction_percentage': sum(1 for x in e if (x.distraction_count or 0) > 3) / n * 100,
+        'activity_percentage': sum(1 for x in e if (x.cursor_movements or 0) > 50) / n * 100,
+        'idle_percentage': sum(1 for x in e if (x.idle_time or 0) > (x.total_time_spent or 1) * 0.5) / n * 100,
+        'time_labels': ['0-5m', '5-10m', '10-15m', '15-20m', '20-25m', '25-30m'],
+        'engagement_over_time': over_time,
+        'low_risk_percentage': sum(1 for x in e if (x.engagement_score or 0) >= 80) / n * 100,
+        'medium_risk_percentage': sum(1 for x in e if 60 <= (x.engagement_score or 0) < 80) / n * 100,
+        'high_risk_percentage': sum(1 for x in e if (x.engagement_score or 0) < 60) / n * 100,
+    }
+
+
+def _random_rows(count, seed=7):
+    rng = random.Random(seed)
+
+    def maybe(value):
+        return None if rng.random() < 0.1 else value
+
+    rows = []
+    for _ in range(count):
+        spent = rng.choice([0, 299, 300, 1799, 1800, rng.randint(0, 2400)])
+        rows.append((maybe(spent), maybe(rng.randint(0, max(spent, 1))), maybe(rng.uniform(0, 100)),
+                     maybe(rng.randint(0, 40)), maybe(rng.randint(0, 120)), maybe(rng.randint(0, 5)),
+                     maybe(rng.randint(0, 6)), maybe(rng.choice([0.0, rng.uniform(50, 300)])),
+                     maybe(rng.randint(0, spent + 1)), maybe(rng.choice([60.0, 80.0, rng.uniform(0, 100)]))))
+    return rows
+
+
+def _assert_close(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        if key == 'time_labels':
+            assert actual[key] == value
+        elif key == 'engagement_over_time':
+            assert all(abs(a - b) < 1e-6 for a, b in zip(actual[key], value)), key
+        else:
+            assert abs(actual[key] - value) < 1e-6, (key, actual[key], value)
+
+
+def test_sql_and_numpy_match_row_by_row_metrics():
+    """Both aggregation paths give the metrics of the original per-row passes, NULLs and bin edges included"""
+    rows = _random_rows(2000)
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(engagement.insert(), [dict(zip(ea.COLUMNS, row)) for row in rows])
+        sql_totals = ea.totals_from_row(conn.execute(ea.totals_query(engagement)).mappings().one())
+        filtered = ea.totals_from_row(conn.execute(ea.totals_query(engagement, engagement.c.id <= 500)).mappings().one())
+        empty = ea.totals_from_row(conn.execute(ea.totals_query(engagement, engagement.c.id < 0)).mappings().one())
+
+    expected = _reference_metrics(rows)
+    _assert_close(ea.metrics_from_totals(sql_totals), expected)
+    _assert_close(ea.metrics_from_totals(ea.totals_from_rows(rows)), expected)
+    _assert_close(ea.metrics_from_totals(filtered), _reference_metrics(rows[:500]))
+    assert empty['count'] == 0 and ea.totals_from_rows([])['count'] == 0
+    print("✓ SQL and NumPy aggregation match the row-by-row metrics")
+
+
+if __name__ == "__main__":
+    test_sql_and_numpy_match_row_by_row_metrics()
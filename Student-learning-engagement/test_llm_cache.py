@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test the persistent LLM response cache (no database or API key required)
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_cache import LLMResponseCache, make_cache_key
+
+
+def test_hits_survive_reopen_and_none_is_not_cached():
+    """Values persist across instances; failed generations (None) are recomputed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache', 'llm.db')
+        calls = []
+        cache = LLMResponseCache(path)
+        key = make_cache_key('teacher_strategy', 'v1', 12, 7, 8)
+        assert key == 'teacher_strategy:v1:12:7:8'
+        assert cache.get_or_compute(key, lambda: calls.append(1) or 'Pair with a peer tutor.') == 'Pair with a peer tutor.'
+        assert LLMResponseCache(path).get(key) == 'Pair with a peer tutor.'  # another worker
+        assert cache.get_or_compute(key, lambda: calls.append(1) or 'other') == 'Pair with a peer tutor.'
+        assert len(calls) == 1
+
+        assert cache.get_or_compute('failing', lambda: None) is None
+        assert cache.get_or_compute('failing', lambda: 'ok') == 'ok'
+        assert make_cache_key('ai_recommendation', 'v1', 3, 4, None) == 'ai_recommendation:v1:3:4:-'
+    print("✓ Cache persists and skips failed generations")
+
+
+def test_ttl_expiry():
+    """Entries older than the TTL are treated as misses and removed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, 'llm.db'), ttl_seconds=0.05)
+        cache.set('k', 'v')
+        assert cache.get('k') == 'v'
+        time.sleep(0.1)
+        assert cache.get('k') is None
+        cache.set('a', '1')
+        cache.set('b', '2')
+        time.sleep(0.1)
+        assert cache.purge_expired() == 2
+    print("✓ TTL expiry")
+
+
+def test_lru_eviction_and_prefix_delete():
+    """Once over capacity the least recently used entry goes first"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, 'llm.db'), max_entries=2)
+        cache.set('x:a', '1')
+        time.sleep(0.01)
+        cache.set('x:b', '2')
+        time.sleep(0.01)
+        assert cache.get('x:a') == '1'  # a is now more recent than b
+        time.sleep(0.01)
+        cache.set('y_c', '3')
+        assert cache.get('x:b') is None
+        assert cache.get('x:a') == '1' and cache.get('y_c') == '3'
+        assert cache.delete_prefix('x:') == 1
+        assert cache.delete_prefix('y%') == 0  # wildcards are literal
+        assert cache.get('y_c') == '3'
+    print("✓ LRU eviction")
+
+
+if __name__ == "__main__":
+    test_hits_survive_reopen_and_none_is_not_cached()
+    test_ttl_expiry()
+    test_lru_eviction_and_prefix_delete()
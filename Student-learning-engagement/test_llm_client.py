@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Test the offline LLM client and the resilient call wrapper (no API key required)
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_client import StubLLMClient, TokenBucket, CircuitBreaker, CircuitOpenError, RateLimitedError, ResilientLLMClient
+
+
+def test_stub_client_mimics_chat_completions():
+    """The stub answers deterministically through the same call shape as the OpenAI SDK"""
+    client = StubLLMClient()
+    messages = [{"role": "system", "content": "You are a consultant."},
+                {"role": "user", "content": "\n   Help Ana succeed:\n   Score: 55%"}]
+    first = client.chat.completions.create(model="gpt-4-turbo", messages=messages, temperature=0.8, max_tokens=200)
+    second = client.chat.completions.create(model="gpt-4-turbo", messages=messages)
+    assert first.choices[0].message.content == "[offline] Help Ana succeed:"
+    assert second.choices[0].message.content == first.choices[0].message.content
+    assert client.calls == 2
+
+    client.fail = True
+    try:
+        client.chat.completions.create(model="gpt-4-turbo", messages=messages)
+        assert False, 'expected the stub to fail'
+    except RuntimeError:
+        pass
+    print("✓ Stub client mimics chat completions")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_limits_rate():
+    """A burst drains the bucket; tokens come back at the configured rate"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=clock)
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_acquire() == 0.5
+    clock.now = 0.5
+    assert bucket.try_acquire() == 0.0
+    clock.now = 100.0
+    assert [bucket.try_acquire() for _ in range(4)][-1] > 0  # refill is capped at capacity
+    print("✓ Token bucket rate limiting")
+
+
+def test_circuit_breaker_opens_and_recovers():
+    """The breaker opens on a high error rate, then lets one trial call through after the cooldown"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_ratio=0.5, window=10, min_calls=4, cooldown=30, clock=clock)
+    for ok in (True, False, True):
+        breaker.record(ok)
+    assert breaker.state == 'closed'
+    breaker.record(False)  # 2 of 4 failed
+    assert breaker.state == 'open' and not breaker.allow()
+
+    clock.now = 31
+    assert breaker.state == 'half_open'
+    assert breaker.allow() and not breaker.allow()  # only one trial at a time
+    breaker.record(False)
+    assert breaker.state == 'open'
+    clock.now = 62
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == 'closed' and breaker.allow()
+
+    breaker = CircuitBreaker(min_calls=1, cooldown=30, clock=clock)
+    breaker.record(False)
+    clock.now += 31
+    assert breaker.allow() and not breaker.allow()
+    breaker.release()  # the trial call never happened
+    assert breaker.state == 'half_open' and breaker.allow()
+    print("✓ Circuit breaker opens and recovers")
+
+
+def test_resilient_client_retries_times_out_and_short_circuits():
+    """Transient errors are retried; slow calls time out; a failing API is short-circuited"""
+    flaky = StubLLMClient()
+    original = flaky._create
+    attempts = []
+
+    def fail_twice(**kwargs):
+        attempts.append(1)
+        if len(attempts) <= 2:
+            raise ConnectionError('reset by peer')
+        return original(**kwargs)
+
+    flaky.chat.completions.create = fail_twice
+    client = ResilientLLMClient(flaky, rate_per_second=1000, burst=10, max_retries=2, backoff_base=0.001,
+                                breaker=CircuitBreaker(min_calls=100))
+    reply = client.chat.completions.create(model='m', messages=[{'role': 'user', 'content': 'hi'}])
+    assert reply.choices[0].message.content == '[offline] hi' and len(attempts) == 3
+
+    slow = ResilientLLMClient(StubLLMClient(delay=0.5), rate_per_second=1000, burst=10, timeout=0.05)
+    started = time.monotonic()
+    try:
+        slow.chat.completions.create(model='m', messages=[])
+        assert False, 'expected a timeout'
+    except TimeoutError:
+        pass
+    assert time.monotonic() - started < 0.4
+
+    down = StubLLMClient(fail=True)
+    client = ResilientLLMClient(down, rate_per_second=1000, burst=10, max_retries=0,
+                                breaker=CircuitBreaker(min_calls=3, cooldown=60))
+    for _ in range(3):
+        try:
+            client.chat.completions.create(model='m', messages=[])
+        except RuntimeError:
+            pass
+    try:
+        client.chat.completions.create(model='m', messages=[])
+        assert False, 'expected the circuit to be open'
+    except CircuitOpenError:
+        pass
+    assert down.calls == 3
+    print("✓ Resilient client retries, times out and short-circuits")
+
+
+def test_open_circuit_fails_without_waiting_for_a_token():
+    """While open, calls are refused at once even when the rate limiter is drained"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_calls=1, cooldown=60, clock=clock)
+    breaker.record(False)
+    stub = StubLLMClient()
+    client = ResilientLLMClient(stub, rate_per_second=0.01, burst=1, timeout=2, breaker=breaker)
+    assert client.bucket.try_acquire() == 0.0  # drain the only token
+    started = time.monotonic()
+    for _ in range(3):
+        try:
+            client.chat.completions.create(model='m', messages=[])
+            assert False, 'expected the circuit to be open'
+        except CircuitOpenError:
+            pass
+    assert time.monotonic() - started < 0.1 and stub.calls == 0
+
+    clock.now = 61  # half-open, but the trial call finds no token
+    client.timeout = 0.05
+    try:
+        client.chat.completions.create(model='m', messages=[])
+        assert False, 'expected the rate limiter to refuse'
+    except RateLimitedError:
+        pass
+    assert breaker.state == 'half_open' and breaker.allow()  # the trial slot was given back
+    print("✓ Open circuit fails fast")
+
+
+def test_resilient_client_bounds_concurrency():
+    """No more than max_concurrency calls reach the API at once"""
+    active = []
+    peak = []
+    lock = threading.Lock()
+    stub = StubLLMClient()
+    original = stub._create
+
+    def tracked(**kwargs):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        return original(**kwargs)
+
+    stub.chat.completions.create = tracked
+    client = ResilientLLMClient(stub, max_concurrency=2, rate_per_second=1000, burst=20, timeout=5)
+    threads = [threading.Thread(target=client.chat.completions.create, kwargs={'model': 'm', 'messages': []})
+               for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(peak) == 2 and len(peak) == 6
+    print("✓ Concurrency is bounded")
+
+
+if __name__ == "__main__":
+    test_stub_client_mimics_chat_completions()
+    test_token_bucket_limits_rate()
+    test_circuit_breaker_opens_and_recovers()
+    test_resilient_client_retries_times_out_and_short_circuits()
+    test_open_circuit_fails_without_waiting_for_a_token()
+    test_resilient_client_bounds_concurrency()
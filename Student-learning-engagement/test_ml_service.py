@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Test ml_service model persistence and caching (no database required)
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ml_service
+
+
+def _with_temp_model_path(fn):
+    def wrapper():
+        original = ml_service.MODEL_PATH
+        with tempfile.TemporaryDirectory() as tmp:
+            ml_service.MODEL_PATH = os.path.join(tmp, 'model.json')
+            ml_service.invalidate_model_cache()
+            try:
+                fn()
+            finally:
+                ml_service.MODEL_PATH = original
+                ml_service.invalidate_model_cache()
+    wrapper.__name__ = fn.__name__
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+@_with_temp_model_path
+def test_load_model_is_cached_until_active_version_changes():
+    """load_model returns the same object until another process moves the active pointer"""
+    old = ml_service.save_model(ml_service.SimpleLogisticModel([0.1, 0.2, 0.3], 0.5))
+    ml_service.save_model(ml_service.SimpleLogisticModel([1.0, 1.0, 1.0], -1.0))
+    saved = ml_service._model_cache[1]
+    first = ml_service.load_model()
+    assert first is saved  # saving primes the cache; no re-read from disk
+    assert ml_service.load_model() is first and first.bias == -1.0
+
+    # Another worker promotes the older version
+    pointer = os.path.join(os.path.dirname(ml_service.MODEL_PATH), 'registry', 'active.json')
+    ml_service._write_json_atomic(pointer, {'version': old, 'history': []})
+    reloaded = ml_service.load_model()
+    assert reloaded is not first and reloaded.bias == 0.5
+    assert ml_service.get_cached_model_version() == old
+    print("✓ Model cache reloads only when the active version changes")
+
+
+@_with_temp_model_path
+def test_training_swaps_cache_and_writes_atomically():
+    """train_model registers a version with its metrics and leaves no temp files behind"""
+    sessions = [{'duration': 100, 'quiz_score': 90, 'completed': True},
+                {'duration': 10, 'quiz_score': 20, 'completed': True}] * 6
+    result = ml_service.train_model(sessions)
+    model = ml_service.load_model()
+    with open(ml_service.MODEL_PATH, encoding='utf-8') as f:
+        on_disk = json.load(f)
+    assert on_disk['weights'] == model.weights
+    assert on_disk['version'] == ml_service.get_cached_model_version()
+    directory = os.path.dirname(ml_service.MODEL_PATH)
+    assert sorted(os.listdir(directory)) == ['model.json', 'registry']
+    assert sorted(os.listdir(os.path.join(directory, 'registry'))) == sorted([on_disk['version'] + '.json', 'active.json'])
+
+    info = ml_service.get_model_info()
+    assert info['version'] == on_disk['version'] and info['source'] == 'full_retrain'
+    assert info['training_samples'] == 12 and info['holdout_samples'] == 3
+    assert info['accuracy'] == result['accuracy'] and info['training_duration_seconds'] >= 0
+    print("✓ Training registers a version and swaps the cached model")
+
+
+@_with_temp_model_path
+def test_promote_rollback_and_prune():
+    """Admins can promote any kept version and roll back; old inactive versions are pruned"""
+    original_keep = ml_service.MODEL_REGISTRY_KEEP
+    ml_service.MODEL_REGISTRY_KEEP = 3
+    try:
+        versions = [ml_service.save_model(ml_service.SimpleLogisticModel([0.0, 0.0, 0.0], float(i)))
+                    for i in range(5)]
+        listed = [v['version'] for v in ml_service.list_model_versions()]
+        assert listed[0] == versions[-1] and ml_service.list_model_versions()[0]['active']
+        assert len(listed) == 4  # newest three plus history entries still kept
+
+        ml_service.promote_model_version(versions[2])
+        assert ml_service.load_model().bias == 2.0
+        assert ml_service.rollback_model()['version'] == versions[4]
+        assert ml_service.load_model().bias == 4.0
+        try:
+            ml_service.promote_model_version('does-not-exist')
+            assert False, 'expected ValueError'
+        except ValueError:
+            pass
+    finally:
+        ml_service.MODEL_REGISTRY_KEEP = original_keep
+    print("✓ Promote, rollback and pruning")
+
+
+def test_vectorized_fit_matches_reference_gradient_descent():
+    """Full-batch fit reproduces the original per-sample gradient descent"""
+    X = [[0.1, 0.9, 1.0], [0.8, 0.2, 1.0], [0.5, 0.7, 0.0], [0.3, 0.1, 1.0], [0.9, 0.95, 1.0], [0.2, 0.4, 0.0]]
+    y = [1.0, 0.0, 1.0, 0.0, 1.0, 0.0]
+
+    # Reference: the original pure-Python loop
+    w, b, m = [0.0, 0.0, 0.0], 0.0, len(X)
+    for _ in range(200):
+        preds = [ml_service.SimpleLogisticModel._sigmoid(sum(wj * xj for wj, xj in zip(w, row)) + b) for row in X]
+        dw = [sum((preds[i] - y[i]) * X[i][j] for i in range(m)) / m for j in range(3)]
+        db = sum(preds[i] - y[i] for i in range(m)) / m
+        w = [wj - 0.1 * dwj for wj, dwj in zip(w, dw)]
+        b -= 0.1 * db
+
+    model = ml_service.SimpleLogisticModel()
+    model.fit(X, y, lr=0.1, epochs=200, tol=0)
+    assert all(abs(a - r) < 1e-9 for a, r in zip(model.weights, w))
+    assert abs(model.bias - b) < 1e-9
+    assert model.epochs_run == 200
+    assert ml_service.SimpleLogisticModel.from_dict(model.to_dict()).predict_proba(X) == model.predict_proba(X)
+    print("✓ Vectorized fit matches the reference implementation")
+
+
+def test_minibatch_and_early_stopping():
+    """Mini-batch SGD learns the signal and early stopping ends training before the epoch cap"""
+    import numpy as np
+    rng = np.random.default_rng(7)
+    X = rng.random((20000, 3))
+    y = (X[:, 1] > 0.5).astype(float)
+    model = ml_service.SimpleLogisticModel()
+    model.fit(X, y, lr=0.5, epochs=500, batch_size=256, tol=1e-3)
+    assert model.epochs_run < 500
+    preds = np.array(model.predict_proba(X)) >= 0.5
+    assert (preds == (y == 1.0)).mean() > 0.9
+    # Extreme logits do not overflow
+    assert ml_service.SimpleLogisticModel([1.0, 0.0, 0.0]).predict_proba([[1e6, 0, 0], [-1e6, 0, 0]]) == [1.0, 0.0]
+    print("✓ Mini-batch SGD with early stopping")
+
+
+@_with_temp_model_path
+def test_streaming_training():
+    """Streaming trainer matches train_model on small histories and re-reads chunks per epoch"""
+    import random
+    rng = random.Random(3)
+    rows = [(rng.randint(0, 200), rng.randint(0, 100), rng.random() < 0.8) for _ in range(400)]
+
+    in_memory = ml_service.train_model([{'duration': d, 'quiz_score': q, 'completed': c} for d, q, c in rows])
+    expected = ml_service.load_model().weights
+    streamed = ml_service.train_model_streaming(lambda: iter([rows[:250], rows[250:]]), chunk_size=1000)
+    assert streamed == in_memory
+
+    # Holdout accuracy comes from a model that never saw the last 20% of rows
+    X, y = ml_service.get_features_and_target(ml_service.build_records(
+        [{'duration': d, 'quiz_score': q, 'completed': c} for d, q, c in rows]))
+    held_out = ml_service.SimpleLogisticModel()
+    held_out.fit(X[:320], y[:320], lr=0.1, epochs=1500)
+    hits = [(p >= 0.5) == (label == 1.0) for p, label in zip(held_out.predict_proba(X[320:]), y[320:])]
+    assert in_memory['accuracy'] == sum(hits) / 80
+    assert ml_service.get_model_info()['holdout_samples'] == 80
+    assert ml_service.load_model().weights == expected
+
+    reads = []
+
+    def pages():
+        reads.append(1)
+        for i in range(0, len(rows), 50):
+            yield rows[i:i + 50]
+
+    result = ml_service.train_model_streaming(pages, chunk_size=50)
+    assert result['status'] == 'trained' and result['samples'] == 400
+    assert result['accuracy'] is not None and result['accuracy'] > 0.8
+    assert len(reads) >= 3  # at least two epochs plus the holdout pass
+    assert ml_service.train_model_streaming(lambda: iter([]), chunk_size=50)['status'] == 'no_data'
+    print("✓ Streaming trainer")
+
+
+@_with_temp_model_path
+def test_online_checkpoints_keep_trained_versions():
+    """Checkpoints never push trained versions out of the registry or the rollback history"""
+    original_keep = ml_service.MODEL_REGISTRY_KEEP
+    ml_service.MODEL_REGISTRY_KEEP = 3
+    try:
+        earlier = ml_service.save_model(ml_service.SimpleLogisticModel([0.0, 0.0, 0.0], 1.0), {'source': 'full_retrain'})
+        retrain = ml_service.save_model(ml_service.SimpleLogisticModel([0.0, 0.0, 0.0], 2.0), {'source': 'full_retrain'})
+        checkpoints = [ml_service.save_model(ml_service.SimpleLogisticModel([0.0, 0.0, 0.0], 2.0 + i / 100),
+                                             {'source': 'online', 'parent_version': retrain})
+                       for i in range(1, 22)]
+        listed = {v['version']: v for v in ml_service.list_model_versions()}
+        assert set(listed) == {earlier, retrain, checkpoints[-1]} and listed[checkpoints[-1]]['active']
+
+        assert ml_service.rollback_model() == {'status': 'rolled_back', 'version': retrain, 'replaced': checkpoints[-1]}
+        assert ml_service.load_model().bias == 2.0
+        assert ml_service.rollback_model()['version'] == earlier
+        ml_service.promote_model_version(retrain)
+        assert ml_service.get_active_model_version() == retrain
+    finally:
+        ml_service.MODEL_REGISTRY_KEEP = original_keep
+    print("✓ Online checkpoints stay out of rollback history and pruning")
+
+
+@_with_temp_model_path
+def test_online_updates_and_checkpoints():
+    """Online SGD steps are visible immediately and written to disk every N updates"""
+    ml_service.save_model(ml_service.SimpleLogisticModel([0.0, 0.0, 0.0], 0.0))
+    original_every = ml_service.ONLINE_CHECKPOINT_EVERY
+    ml_service.ONLINE_CHECKPOINT_EVERY = 3
+    try:
+        before = ml_service.load_model()
+        first = ml_service.update_model_online(100, 95, True)
+        after = ml_service.load_model()
+        assert after is not before and after.bias > before.bias  # a success pushes the bias up
+        assert before.bias == 0.0  # readers holding the old model are unaffected
+        assert not first['checkpointed']
+        with open(ml_service.MODEL_PATH, encoding='utf-8') as f:
+            assert json.load(f)['bias'] == 0.0
+
+        ml_service.update_model_online(10, 20, True)
+        third = ml_service.update_model_online(100, 90, True)
+        assert third['checkpointed']
+        with open(ml_service.MODEL_PATH, encoding='utf-8') as f:
+            on_disk = json.load(f)
+        assert on_disk['bias'] == ml_service.load_model().bias
+        assert on_disk['online_updates'] == third['online_updates']
+        assert not ml_service.checkpoint_online_model()  # nothing pending
+    finally:
+        ml_service.ONLINE_CHECKPOINT_EVERY = original_every
+    print("✓ Online updates with periodic checkpoints")
+
+
+@_with_temp_model_path
+def test_batch_recommendations_match_single():
+    """recommend_for_students scores a class in one call, matching the model computed by hand"""
+    from math import exp
+    summaries = [{'duration': 100, 'quiz_score': 95, 'completed': True},
+                 {'duration': 5, 'quiz_score': 10, 'completed': False},
+                 {'duration': None, 'quiz_score': None, 'completed': None},
+                 {'duration': 500, 'quiz_score': 60, 'completed': True},
+                 {'duration': 60, 'quiz_score': 55, 'completed': False}]
+    features = [(min((s['duration'] or 0) / 120.0, 1.0), min((s['quiz_score'] or 0) / 100.0, 1.0),
+                 1.0 if s['completed'] else 0.0) for s in summaries]
+
+    # No model yet: heuristic fallback
+    heuristic = [0.7 * q + 0.2 * d + 0.1 * c for d, q, c in features]
+    batch = ml_service.recommend_for_students(summaries)
+    assert all(abs(r['success_probability'] - p) < 1e-12 for r, p in zip(batch, heuristic))
+
+    weights, bias = [0.5, 3.0, 1.0], -2.0
+    ml_service.save_model(ml_service.SimpleLogisticModel(weights, bias))
+    expected = [1.0 / (1.0 + exp(-(sum(w * x for w, x in zip(weights, row)) + bias))) for row in features]
+    batch = ml_service.recommend_for_students(summaries)
+    assert all(abs(r['success_probability'] - p) < 1e-12 for r, p in zip(batch, expected))
+    # p >= 0.8 advance, >= 0.5 practice, else review; High at <= 0.2 / >= 0.8, Medium at <= 0.4 / >= 0.6
+    assert [r['recommended_action'] for r in batch] == [
+        'advance', 'review_prerequisites', 'review_prerequisites', 'practice_related', 'review_prerequisites']
+    assert [r['confidence_level'] for r in batch] == ['High', 'High', 'High', 'Medium', 'Low']
+    assert ml_service.recommend_for_students([]) == []
+    print("✓ Batch recommendations match hand-computed scores")
+
+
+if __name__ == "__main__":
+    test_load_model_is_cached_until_active_version_changes()
+    test_training_swaps_cache_and_writes_atomically()
+    test_promote_rollback_and_prune()
+    test_online_checkpoints_keep_trained_versions()
+    test_vectorized_fit_matches_reference_gradient_descent()
+    test_minibatch_and_early_stopping()
+    test_streaming_training()
+    test_online_updates_and_checkpoints()
+    test_batch_recommendations_match_single()
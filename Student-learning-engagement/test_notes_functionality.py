@@ -14,7 +14,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
     from app import app, db, StudentNotes, Student, User, Resource
-    from sqlalchemy import text
+    from sqlalchemy import text, inspect
     
     def test_database_structure():
         """Test if the StudentNotes table exists and has proper structure"""
@@ -28,15 +28,14 @@ try:
             print("✓ Tables created/verified")
             
             # Check if student_notes table exists
-            result = db.session.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='student_notes'"))
-            table_exists = result.fetchone()
+            inspector = inspect(db.engine)
+            table_exists = inspector.has_table('student_notes')
             
             if table_exists:
                 print("✓ student_notes table exists")
                 
                 # Check table structure
-                result = db.session.execute(text("PRAGMA table_info(student_notes)"))
-                columns = [row[1] for row in result.fetchall()]
+                columns = [column['name'] for column in inspector.get_columns('student_notes')]
                 print(f"✓ Columns: {columns}")
                 
                 # Check for required columns
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test the EXPLAIN QUERY PLAN helpers (no app database required)
+"""
+
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, text
+
+from query_plan import explain_query_plan, full_scans, record_statements, analyze_statements
+
+
+def test_full_scans_are_detected_and_indexes_are_not():
+    """A filter on an unindexed column scans the table; adding the index turns it into a search"""
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE student_activity (id INTEGER PRIMARY KEY, student_id INTEGER, timestamp TEXT)')
+    query = 'SELECT * FROM student_activity WHERE student_id = ? AND timestamp >= ?'
+    assert full_scans(explain_query_plan(connection, query, (1, '2024-01-01'))) == ['student_activity']
+
+    connection.execute('CREATE INDEX ix_student_activity_student_time ON student_activity (student_id, timestamp)')
+    plan = explain_query_plan(connection, query, (1, '2024-01-01'))
+    assert full_scans(plan) == [] and any('ix_student_activity_student_time' in d for d in plan)
+    # A covering-index walk and the legacy "SCAN TABLE" wording
+    assert full_scans(['SCAN student_activity USING COVERING INDEX ix_x', 'SCAN TABLE question']) == ['question']
+    print("✓ Full scans detected")
+
+
+def test_recorded_statements_are_planned_and_flagged():
+    """Only SELECTs are recorded; scans outside the table list or on allowed tables are not flagged"""
+    engine = create_engine('sqlite://')
+    with engine.connect() as conn:
+        conn.execute(text('CREATE TABLE student (id INTEGER PRIMARY KEY, user_id INTEGER, teacher_id INTEGER)'))
+        conn.execute(text('CREATE INDEX ix_student_user_id ON student (user_id)'))
+        conn.execute(text('CREATE TABLE quiz_metadata (id INTEGER PRIMARY KEY, time_limit INTEGER)'))
+        with record_statements(engine) as statements:
+            conn.execute(text('INSERT INTO student (user_id, teacher_id) VALUES (1, 2)'))
+            conn.execute(text('SELECT * FROM student WHERE user_id = :u'), {'u': 1})
+            conn.execute(text('SELECT * FROM student WHERE user_id = :u'), {'u': 2})
+            conn.execute(text('SELECT * FROM student WHERE teacher_id = :t'), {'t': 2})
+            conn.execute(text('SELECT * FROM quiz_metadata'))
+            conn.execute(text('SELECT * FROM (SELECT teacher_id FROM student WHERE user_id = 1) AS anon_1'))
+        conn.execute(text('SELECT * FROM student'))  # after the block: not recorded
+        assert len(statements) == 5
+
+        report = analyze_statements(conn.connection.dbapi_connection, statements,
+                                    allowed_scans=('quiz_metadata',), tables={'student', 'quiz_metadata'})
+    assert len(report) == 4  # duplicate statement planned once
+    assert [entry['flagged'] for entry in report] == [[], ['student'], [], []]
+    assert report[2]['full_scans'] == ['quiz_metadata']
+    print("✓ Recorded statements planned and flagged")
+
+
+if __name__ == "__main__":
+    test_full_scans_are_detected_and_indexes_are_not()
+    test_recorded_statements_are_planned_and_flagged()
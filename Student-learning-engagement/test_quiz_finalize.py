@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test quiz finalization: the score is stored in the request and the completion
+recommendation follows inline or from the background job
+(runs against the test database configured in conftest.py, with the stub LLM client)
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import csrf_token, logged_in_client, make_resource, make_students, make_user
+import app as app_module
+from app import app, db, Question, StudySession
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.05)
+    raise AssertionError('condition not met in time')
+
+
+def _take_quiz():
+    """Answer a fresh two-question quiz (one right, one wrong); returns (client, completion payload)"""
+    with app.app_context():
+        db.create_all()
+        teacher = make_user('teacher')
+        quiz = make_resource(teacher, 'quiz')
+        student, = make_students(teacher, with_login=True)
+        questions = [Question(resource_id=quiz.id, question_text=f'Q{i}', correct_answer='A', options=['yes', 'no'])
+                     for i in range(2)]
+        db.session.add_all(questions)
+        db.session.commit()
+        user_id, quiz_id, question_ids = student.user_id, quiz.id, [q.id for q in questions]
+
+    client = logged_in_client(user_id)
+    token = csrf_token(client)
+    for question_id, answer in zip(question_ids, ['yes', 'no']):
+        response = client.post('/student/submit_answer', data={
+            'question_id': question_id, 'answer': answer, 'resource_id': quiz_id, 'csrf_token': token})
+        assert response.status_code == 200
+    payload = response.get_json()
+    assert payload['completed'] and payload['final_score'] == 50.0
+    with app.app_context():
+        assert db.session.get(StudySession, payload['session_id']).quiz_score == 50.0
+    return client, payload
+
+
+def _poll(client, payload):
+    return client.get(payload['recommendation_url']).get_json()
+
+
+def test_inline_finalization_returns_the_recommendation():
+    """With QUIZ_FINALIZE_ASYNC off the completion payload already carries the recommendation"""
+    # Local mode: no background upgrade replaces the text between completion and the poll
+    modes = app.config['RECOMMENDATION_ROUTE_MODES']
+    app.config['QUIZ_FINALIZE_ASYNC'] = False
+    app.config['RECOMMENDATION_ROUTE_MODES'] = dict(modes, quiz_completion='local')
+    try:
+        client, payload = _take_quiz()
+    finally:
+        app.config['QUIZ_FINALIZE_ASYNC'] = True
+        app.config['RECOMMENDATION_ROUTE_MODES'] = modes
+    assert payload['recommendation_status'] == 'ready' and payload['ai_recommendation']
+    assert _poll(client, payload) == {'success': True, 'status': 'ready', 'ai_recommendation': payload['ai_recommendation']}
+    print("✓ Inline finalization")
+
+
+def test_deferred_finalization_goes_from_pending_to_ready():
+    """With QUIZ_FINALIZE_ASYNC on the score is stored at once and the page polls for the recommendation"""
+    client, payload = _take_quiz()
+    assert payload['recommendation_status'] == 'pending' and payload['ai_recommendation'] is None
+    ready = _wait_for(lambda: (lambda data: data if data['status'] == 'ready' else None)(_poll(client, payload)))
+    assert ready['ai_recommendation']
+    print("✓ Deferred finalization becomes ready")
+
+
+def test_failing_job_stores_fallback_and_stops_requeuing():
+    """A failing job stores the template text; if even that fails, polls stop re-queuing after the cap"""
+    original_complete = app_module.complete_quiz_session
+    original_local = app_module.local_student_recommendation
+    runs = []
+
+    def failing_complete(session):
+        runs.append(session.id)
+        raise RuntimeError('LLM and database both unhappy')
+
+    app_module.complete_quiz_session = failing_complete
+    try:
+        client, payload = _take_quiz()
+        ready = _wait_for(lambda: (lambda data: data if data['status'] == 'ready' else None)(_poll(client, payload)))
+        with app.app_context():
+            expected = original_local(db.session.get(StudySession, payload['session_id']))
+        assert ready['ai_recommendation'] == expected and len(runs) == 1
+
+        def failing_local(session):
+            raise RuntimeError('template engine unavailable')
+
+        app_module.local_student_recommendation = failing_local
+        runs.clear()
+        client, payload = _take_quiz()
+        session_id = payload['session_id']
+        max_attempts = app.config['QUIZ_FINALIZE_MAX_ATTEMPTS']
+        for attempt in range(1, max_attempts + 1):
+            _wait_for(lambda: app_module._quiz_finalize_failures.get(session_id) == attempt)
+            assert _poll(client, payload)['status'] == ('unavailable' if attempt == max_attempts else 'pending')
+        for _ in range(3):
+            assert _poll(client, payload)['status'] == 'unavailable'
+        time.sleep(0.2)
+        assert len(runs) == max_attempts and app_module.quiz_finalize_worker.queue_depth() == 0
+    finally:
+        app_module.complete_quiz_session = original_complete
+        app_module.local_student_recommendation = original_local
+    print("✓ Failed finalization falls back and is not re-queued forever")
+
+
+def test_only_deferred_sessions_are_completed_by_polling():
+    """Completed sessions the finalizer never deferred (older or force-closed ones) are not
+    finalized by a poll, and unscored sessions never reach the online model"""
+    from datetime import datetime
+    original_complete = app_module.complete_quiz_session
+    original_update = app_module.ml_update_online
+    runs, updates = [], []
+    app_module.complete_quiz_session = lambda session: runs.append(session.id)
+    app_module.ml_update_online = lambda *args: updates.append(args)
+    try:
+        with app.app_context():
+            db.create_all()
+            teacher = make_user('teacher')
+            quiz = make_resource(teacher, 'quiz')
+            student, = make_students(teacher, with_login=True)
+            session = StudySession(student_id=student.id, resource_id=quiz.id, start_time=datetime.now(),
+                                   end_time=datetime.now(), duration=30, completed=True)
+            db.session.add(session)
+            db.session.commit()
+            user_id, session_id = student.user_id, session.id
+
+        client = logged_in_client(user_id)
+        url = f'/student/session/{session_id}/recommendation'
+        assert client.get(url).get_json() == {'success': True, 'status': 'unavailable', 'ai_recommendation': None}
+        app_module._run_quiz_finalize_job(session_id)
+        time.sleep(0.2)
+        assert runs == [] and app_module.quiz_finalize_worker.queue_depth() == 0
+
+        with app.app_context():
+            session = db.session.get(StudySession, session_id)
+            assert original_complete(session) and not session.recommendation_pending
+        assert updates == []
+    finally:
+        app_module.complete_quiz_session = original_complete
+        app_module.ml_update_online = original_update
+    print("✓ Polling does not finalize sessions that were never deferred")
+
+
+if __name__ == "__main__":
+    test_inline_finalization_returns_the_recommendation()
+    test_deferred_finalization_goes_from_pending_to_ready()
+    test_failing_job_stores_fallback_and_stops_requeuing()
+    test_only_deferred_sessions_are_completed_by_polling()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test the set-based quiz results analytics and the score repair job
+(runs against the test database configured in conftest.py)
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import make_resource, make_students, make_user
+from app import (app, db, Student, Question, StudentAnswer, StudySession,
+                 _quiz_attempt_statistics, _quiz_question_analytics, repair_quiz_scores)
+
+
+def _make_quiz():
+    """Two MCQs; three students who answered (the first one twice) and one unscored completed attempt"""
+    teacher = make_user('teacher')
+    quiz = make_resource(teacher, 'quiz', grade='6', title='Fractions')
+    first = Question(resource_id=quiz.id, question_text='1/2 + 1/4?', correct_answer='A', options=['3/4', '2/6'])
+    second = Question(resource_id=quiz.id, question_text='1/3 of 9?', correct_answer='A', options=['3', '6'])
+    db.session.add_all([first, second])
+    db.session.flush()
+
+    students = make_students(teacher, 3, grade='6')
+    picks = [('A', 'A'), ('A', 'B'), ('B', 'B')]
+    for student, (first_pick, second_pick) in zip(students, picks):
+        db.session.add(StudentAnswer(student_id=student.id, question_id=first.id, answer=first_pick, is_correct=first_pick == 'A'))
+        db.session.add(StudentAnswer(student_id=student.id, question_id=second.id, answer=second_pick, is_correct=second_pick == 'A'))
+    # A later answer to the same question does not change the first one
+    db.session.add(StudentAnswer(student_id=students[0].id, question_id=first.id, answer='B', is_correct=False))
+    scores = [None, 50.0, 0.0]
+    for student, score in zip(students, scores):
+        db.session.add(StudySession(student_id=student.id, resource_id=quiz.id, start_time=datetime.now(),
+                                    end_time=datetime.now(), quiz_score=score, completed=True))
+    db.session.add(StudySession(student_id=students[2].id, resource_id=quiz.id, start_time=datetime.now()))
+    db.session.commit()
+    return quiz, [first, second]
+
+
+def test_quiz_statistics_and_question_analytics():
+    """Attempt statistics, histogram, distributions and correctness come from aggregate queries"""
+    with app.app_context():
+        db.create_all()
+        quiz, questions = _make_quiz()
+
+        stats = _quiz_attempt_statistics(quiz.id)
+        assert (stats['total_attempts'], stats['completed_attempts'], stats['unscored_attempts']) == (4, 3, 1)
+        assert (stats['average_score'], stats['highest_score'], stats['lowest_score']) == (25.0, 50.0, 0.0)
+        histogram = {bucket['label']: bucket['count'] for bucket in stats['score_histogram']}
+        assert histogram['0-9%'] == 1 and histogram['50-59%'] == 1 and sum(histogram.values()) == 2
+
+        attempts = db.session.query(StudySession, Student).join(Student, StudySession.student_id == Student.id).filter(
+            StudySession.resource_id == quiz.id).order_by(StudySession.id).all()
+        answers, question_stats = _quiz_question_analytics(quiz.id, questions, attempts)
+        first_stats = question_stats[questions[0].id]
+        assert (first_stats['answered'], first_stats['correct']) == (3, 2)
+        assert first_stats['distribution'][0] == {'answer': 'A', 'count': 2, 'is_correct': True}
+        assert question_stats[questions[1].id]['correct'] == 1
+        assert [answer.answer for _, answer in answers[questions[0].id]] == ['A', 'A', 'B']
+    print("✓ Quiz statistics and question analytics")
+
+
+def test_repair_fills_missing_scores():
+    """Completed attempts without a score get the MCQ score; scored ones are left alone"""
+    with app.app_context():
+        db.create_all()
+        quiz, _ = _make_quiz()
+        assert repair_quiz_scores(quiz.id) == 1
+        scores = [session.quiz_score for session in
+                  StudySession.query.filter_by(resource_id=quiz.id, completed=True).order_by(StudySession.id)]
+        assert scores == [100.0, 50.0, 0.0]
+        assert repair_quiz_scores(quiz.id) == 0
+    print("✓ Missing quiz scores repaired")
+
+
+if __name__ == "__main__":
+    test_quiz_statistics_and_question_analytics()
+    test_repair_fills_missing_scores()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test that the student dashboard is built from a fixed number of queries
+(runs against the test database configured in conftest.py)
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import logged_in_client, make_resource, make_students, make_user
+from app import app, db, User, Student, QuizMetadata, Question, StudentAnswer, StudySession, QuizReassessment
+from query_plan import record_statements
+
+
+def _add_quiz(teacher, student, index):
+    """A published quiz: a 2-mark MCQ answered correctly (then again, wrongly) and a 3-mark essay awarded 1.5"""
+    quiz = make_resource(teacher, 'quiz', grade=student.grade, title=f'Quiz {index}')
+    db.session.add(QuizMetadata(resource_id=quiz.id, created_by=teacher.id, marks_published=True))
+    mcq = Question(resource_id=quiz.id, question_text='Pick one', correct_answer='A', options=['a', 'b'], marks=2)
+    essay = Question(resource_id=quiz.id, question_text='Explain', question_type='essay', marks=3)
+    db.session.add_all([mcq, essay])
+    db.session.flush()
+    db.session.add_all([
+        StudentAnswer(student_id=student.id, question_id=mcq.id, answer='A', is_correct=True),
+        StudentAnswer(student_id=student.id, question_id=mcq.id, answer='B', is_correct=False),
+        StudentAnswer(student_id=student.id, question_id=essay.id, answer='Because', marks_awarded=1.5),
+    ])
+    finished = datetime.now() - timedelta(minutes=index)
+    db.session.add(StudySession(student_id=student.id, resource_id=quiz.id, start_time=finished - timedelta(minutes=5),
+                                end_time=finished, quiz_score=50.0, completed=True))
+    if index % 2:
+        db.session.add(QuizReassessment(student_id=student.id, resource_id=quiz.id, granted_by=teacher.id))
+    db.session.commit()
+
+
+def _dashboard_queries(client):
+    with app.app_context():
+        with record_statements(db.engine) as statements:
+            response = client.get('/student/dashboard')
+    assert response.status_code == 200
+    return len(statements), response.get_data(as_text=True)
+
+
+def test_dashboard_query_count_does_not_grow_with_quizzes():
+    """Two quizzes or eight, the dashboard issues the same number of queries"""
+    with app.app_context():
+        db.create_all()
+        teacher = make_user('teacher')
+        student, = make_students(teacher, with_login=True)
+        db.session.commit()
+        for index in range(2):
+            _add_quiz(teacher, student, index)
+        teacher_id, student_id, user_id = teacher.id, student.id, student.user_id
+
+    client = logged_in_client(user_id)
+
+    small_count, html = _dashboard_queries(client)
+    assert '3.5/5 marks' in html
+
+    with app.app_context():
+        teacher = db.session.get(User, teacher_id)
+        student = db.session.get(Student, student_id)
+        for index in range(2, 8):
+            _add_quiz(teacher, student, index)
+
+    large_count, html = _dashboard_queries(client)
+    assert html.count('3.5/5 marks') == 5  # recent results are capped at five
+    assert large_count == small_count, (small_count, large_count)
+    print(f"✓ Dashboard uses {large_count} queries for 2 and 8 quizzes")
+
+
+if __name__ == "__main__":
+    test_dashboard_query_count_does_not_grow_with_quizzes()
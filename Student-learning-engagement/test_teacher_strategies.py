@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test the background teacher strategy flow end to end with the stub LLM client
+(runs against the test database configured in conftest.py)
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import logged_in_client, make_resource, make_students, make_user
+import app as app_module
+from app import app, db, StudySession, get_teacher_strategy
+
+
+def test_strategy_goes_from_pending_to_ready_and_is_served_from_cache():
+    """The poll endpoint queues a job, the worker fills the cache, later reads make no API call"""
+    with app.app_context():
+        db.create_all()
+        teacher = make_user('teacher')
+        quiz = make_resource(teacher, 'quiz')
+        student, = make_students(teacher)
+        finished = datetime.now()
+        session = StudySession(student_id=student.id, resource_id=quiz.id, start_time=finished - timedelta(minutes=9),
+                               end_time=finished, duration=540, quiz_score=45.0, completed=True)
+        db.session.add(session)
+        db.session.commit()
+        teacher_id, student_id, session_id = teacher.id, student.id, session.id
+
+    stub = app_module.client.client
+    before = stub.calls
+    client = logged_in_client(teacher_id)
+    url = f'/api/teacher/strategies?student_ids={student_id}'
+    first = client.get(url).get_json()
+    assert first['pending'] == 1 and first['strategies'][str(student_id)] == {'status': 'pending', 'strategy': None}
+
+    deadline = time.monotonic() + 10
+    while True:
+        data = client.get(url).get_json()
+        if data['pending'] == 0:
+            break
+        assert time.monotonic() < deadline, 'strategy job did not finish'
+        time.sleep(0.05)
+    ready = data['strategies'][str(student_id)]
+    assert ready['status'] == 'ready' and ready['strategy'].startswith('[offline]')
+
+    calls = stub.calls
+    assert calls > before  # generated through the (stub) API by the worker
+    assert client.get(url).get_json()['strategies'][str(student_id)] == ready
+    with app.app_context():
+        assert get_teacher_strategy(db.session.get(StudySession, session_id)) == ('ready', ready['strategy'])
+    assert stub.calls == calls
+    print("✓ Teacher strategy: pending, generated in the background, then served from the cache")
+
+
+if __name__ == "__main__":
+    test_strategy_goes_from_pending_to_ready_and_is_served_from_cache()